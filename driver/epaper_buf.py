@@ -7,7 +7,6 @@
 # 参考资料:
 # https://github.com/mcauser/micropython-waveshare-epaper
 # https://github.com/AntonVanke/MicroPython-uFont/blob/master/driver/e1in54.py
-import math
 from struct import pack
 from time import sleep_ms
 from machine import Pin, PWM
@@ -43,9 +42,14 @@ TERMINATE_FRAME_READ_WRITE           = const(0xFF) # aka NOOP
 
 BUSY = const(1)  # 1=busy, 0=idle
 
+# Waveform look-up tables, read-only so they can stay in flash when frozen
+LUT_FULL_UPDATE    = b'\x02\x02\x01\x11\x12\x12\x22\x22\x66\x69\x69\x59\x58\x99\x99\x88\x00\x00\x00\x00\xF8\xB4\x13\x51\x35\x51\x51\x19\x01\x00'
+LUT_PARTIAL_UPDATE = b'\x10\x18\x18\x08\x18\x18\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x13\x14\x44\x12\x00\x00\x00\x00\x00\x00'
+
 class EPD(FrameBuffer):
-    LUT_FULL_UPDATE    = bytearray(b'\x02\x02\x01\x11\x12\x12\x22\x22\x66\x69\x69\x59\x58\x99\x99\x88\x00\x00\x00\x00\xF8\xB4\x13\x51\x35\x51\x51\x19\x01\x00')
-    LUT_PARTIAL_UPDATE = bytearray(b'\x10\x18\x18\x08\x18\x18\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x13\x14\x44\x12\x00\x00\x00\x00\x00\x00')
+    PARTIAL_LIMIT = 10  # 连续局部刷新的最大次数，超过后改为全屏刷新以消除残影
+    LUT_FULL_UPDATE    = LUT_FULL_UPDATE
+    LUT_PARTIAL_UPDATE = LUT_PARTIAL_UPDATE
 
     def __init__(self, width: int, height: int, spi, res: int, dc: int, busy:int,
                  cs: int = None, bl: int = None):
@@ -65,6 +69,7 @@ class EPD(FrameBuffer):
         self.width = width
         self.height = height
         self.spi = spi
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
         self.res = Pin(res, Pin.OUT, Pin.PULL_DOWN, value=0)
         self.dc = Pin(dc, Pin.OUT, Pin.PULL_DOWN, value=0)
         self.busy = Pin(busy, Pin.IN)
@@ -74,20 +79,26 @@ class EPD(FrameBuffer):
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN, value=1)
         if bl is not None:
             self.bl = PWM(Pin(bl, Pin.OUT))
+            self.bl.freq(1000)
             self.back_light(255)
         else:
             self.bl = None
         self.pages = self.height // 8
         self.buffer = bytearray(self.width * self.pages)
+        self._mv = memoryview(self.buffer)  # 切片时不会复制数据
+        # 局部刷新时取出修改区域的缓冲区，超过屏幕一半的区域会改为全屏刷新，因此只需一半大小
+        self._partial_buf = bytearray(self.width * self.height // 16)
+        self._partial_mv = memoryview(self._partial_buf)
+        self._clear_buf = None  # 清屏数据缓存，首次清屏时分配
+        self._clear_color = None
+        self._dirty = None  # 自上次刷新以来被修改的区域 [x0, y0, x1, y1]
+        self._partial_count = 0
         super().__init__(self.buffer, self.width, self.height, MONO_HLSB)
         self.init()
         
     def init(self):
         self.hard_reset()
-        self._write(DRIVER_OUTPUT_CONTROL)
-        self.write_data(bytearray([(EPD_HEIGHT - 1) & 0xFF]))
-        self.write_data(bytearray([((EPD_HEIGHT - 1) >> 8) & 0xFF]))
-        self.write_data(bytearray([0x00])) # GD = 0 SM = 0 TB = 0
+        self._write(DRIVER_OUTPUT_CONTROL, b'\xC7\x00\x00') # EPD_HEIGHT - 1 (LSB, MSB), GD = 0 SM = 0 TB = 0
         self._write(BOOSTER_SOFT_START_CONTROL, b'\xD7\xD6\x9D')
         self._write(WRITE_VCOM_REGISTER, b'\xA8') # VCOM 7C
         self._write(SET_DUMMY_LINE_PERIOD, b'\x1A') # 4 dummy lines per gate
@@ -100,7 +111,8 @@ class EPD(FrameBuffer):
         self.cs(0)
         if command is not None:
             self.dc(0)
-            self.spi.write(bytes([command]))
+            self._cmd_buf[0] = command
+            self.spi.write(self._cmd_buf)
         if data is not None:
             self.dc(1)
             self.spi.write(data)
@@ -115,7 +127,8 @@ class EPD(FrameBuffer):
         """
         self.cs(0)
         self.dc(0)
-        self.spi.write(bytes([cmd]))
+        self._cmd_buf[0] = cmd
+        self.spi.write(self._cmd_buf)
         self.cs(1)
 
     def write_data(self, data):
@@ -175,18 +188,19 @@ class EPD(FrameBuffer):
         else:
             y_end = y + h - 1
 
-        self.set_window(x, y, x_end, y_end)
+        self.set_memory_area(x, y, x_end, y_end)
         self.set_memory_pointer(x, y)
         self._write(WRITE_RAM, image)
 
     # replace the frame memory with the specified color
     def clear_frame_memory(self, color):
-        self.set_window(0, 0, self.width - 1, self.height - 1)
+        # build the color data once and send it in a single transfer
+        if color != self._clear_color:
+            self._clear_buf = bytes([color & 0xFF]) * (self.width // 8 * self.height)
+            self._clear_color = color
+        self.set_memory_area(0, 0, self.width - 1, self.height - 1)
         self.set_memory_pointer(0, 0)
-        self._write(WRITE_RAM)
-        # send the color data
-        for i in range(0, self.width // 8 * self.height):
-            self.write_data(bytearray([color]))
+        self._write(WRITE_RAM, self._clear_buf)
 
     # draw the current frame memory and switch to the next memory area
     def display_frame(self):
@@ -197,27 +211,180 @@ class EPD(FrameBuffer):
 
     # specify the memory area for data R/W
     def set_memory_area(self, x_start, y_start, x_end, y_end):
-        self._write(SET_RAM_X_ADDRESS_START_END_POSITION)
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.write_data(bytearray([(x_start >> 3) & 0xFF]))
-        self.write_data(bytearray([(x_end >> 3) & 0xFF]))
+        self._write(SET_RAM_X_ADDRESS_START_END_POSITION, bytes([(x_start >> 3) & 0xFF, (x_end >> 3) & 0xFF]))
         self._write(SET_RAM_Y_ADDRESS_START_END_POSITION, pack("<HH", y_start, y_end))
 
     # specify the start point for data R/W
     def set_memory_pointer(self, x, y):
-        self._write(SET_RAM_X_ADDRESS_COUNTER)
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.write_data(bytearray([(x >> 3) & 0xFF]))
+        self._write(SET_RAM_X_ADDRESS_COUNTER, bytes([(x >> 3) & 0xFF]))
         self._write(SET_RAM_Y_ADDRESS_COUNTER, pack("<H", y))
         self.wait_until_idle()
 
-    def clear(self):
+    def clear(self, refresh=False):
+        """
+        清屏
+
+        Args:
+            refresh: 立即刷新屏幕，直接发送缓存的清屏数据，无需上传帧缓冲区
+        """
         self.fill(0)
+        if refresh:
+            self.clear_frame_memory(0x00)
+            self.display_frame()
+            self.clear_frame_memory(0x00)  # 刷新后切换到另一块显存，同样写入，使两块显存内容一致
+            self._dirty = None
+            self._partial_count = 0
+
+    def show(self, partial=False):
+        """
+        将帧缓冲区数据发送到屏幕
 
+        Args:
+            partial: 局部刷新，仅上传被修改的区域并使用局部刷新波形；
+                修改区域超过屏幕一半或连续局部刷新超过 PARTIAL_LIMIT 次时仍进行全屏刷新
+        """
+        d = self._dirty
+        if partial and d is None:
+            return  # 没有需要刷新的内容
+        if partial and self._partial_count < self.PARTIAL_LIMIT:
+            # x point must be the multiple of 8 or the last 3 bits will be ignored
+            x0 = d[0] & 0xF8
+            x1 = d[2] | 0x07
+            w = x1 - x0 + 1
+            h = d[3] - d[1] + 1
+            if w * h * 2 <= self.width * self.height:
+                self._show_partial(x0, d[1], w, h)
+                self._partial_count += 1
+                self._dirty = None
+                return
+        self._show_full()
+        self._dirty = None
+        self._partial_count = 0
+
+    def _show_full(self):
+        """
+        上传整个帧缓冲区并进行全屏刷新，窗口固定为整个屏幕，无需再计算边界
+        """
+        self.set_memory_area(0, 0, self.width - 1, self.height - 1)
+        self.set_memory_pointer(0, 0)
+        self._write(WRITE_RAM, self._mv)
+        self.display_frame()
+        # 刷新后切换到另一块显存，再写入一次使两块显存内容一致，否则局部刷新时区域外的像素会回退或产生残影
+        self.set_memory_area(0, 0, self.width - 1, self.height - 1)
+        self.set_memory_pointer(0, 0)
+        self._write(WRITE_RAM, self._mv)
 
-    def show(self):
-        self.set_frame_memory(self.buffer, 0, 0, 200, 200)
+    def _show_partial(self, x, y, w, h):
+        """
+        使用局部刷新波形上传并显示指定区域，x 与 w 需为 8 的倍数
+        """
+        row = self.width >> 3
+        bw = w >> 3
+        sub = self._partial_mv[:bw * h]  # 复用预先分配的缓冲区，切片时不会复制数据
+        mv = self._mv
+        offset = y * row + (x >> 3)
+        for i in range(h):  # 从帧缓冲区中逐行取出该区域
+            sub[i * bw:(i + 1) * bw] = mv[offset:offset + bw]
+            offset += row
+        self.set_refresh(False)
+        self.set_frame_memory(sub, x, y, w, h)
         self.display_frame()
+        # 局部刷新波形会比较两块显存，刷新后向切换到的另一块显存写入相同的数据，保持两者一致
+        self.set_frame_memory(sub, x, y, w, h)
+        self.set_refresh(True)
+
+    def register_updates(self, x0, y0, x1, y1):
+        """
+        记录被修改的区域，供局部刷新使用
+
+        Args:
+            x0: 左上角 x 坐标
+            y0: 左上角 y 坐标
+            x1: 右下角 x 坐标
+            y1: 右下角 y 坐标
+        """
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        # 将区域限制在画布的范围内
+        if x1 < 0 or y1 < 0 or x0 >= self.width or y0 >= self.height:
+            return
+        if x0 < 0:
+            x0 = 0
+        if y0 < 0:
+            y0 = 0
+        if x1 >= self.width:
+            x1 = self.width - 1
+        if y1 >= self.height:
+            y1 = self.height - 1
+        d = self._dirty
+        if d is None:
+            self._dirty = [x0, y0, x1, y1]
+        else:
+            if x0 < d[0]:
+                d[0] = x0
+            if y0 < d[1]:
+                d[1] = y0
+            if x1 > d[2]:
+                d[2] = x1
+            if y1 > d[3]:
+                d[3] = y1
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self.register_updates(x, y, x, y)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self.register_updates(x, y, x + len(s) * 8 - 1, y + 7)
+
+    def line(self, x0, y0, x1, y1, c):
+        super().line(x0, y0, x1, y1, c)
+        self.register_updates(x0, y0, x1, y1)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self.register_updates(x, y, x + w - 1, y)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self.register_updates(x, y, x, y + h - 1)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            super().fill_rect(x, y, w, h, c)
+        else:
+            super().rect(x, y, w, h, c)
+        self.register_updates(x, y, x + w - 1, y + h - 1)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self.register_updates(x, y, x + w - 1, y + h - 1)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self.register_updates(x - xr, y - yr, x + xr, y + yr)
+
+    def poly(self, x, y, coords, c, *args):
+        super().poly(x, y, coords, c, *args)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
+
+    def fill(self, c):
+        super().fill(c)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        super().blit(fbuf, x, y, key, palette)
+        self.register_updates(x, y, self.width - 1, self.height - 1)
+
+    def scroll(self, x, y):
+        super().scroll(x, y)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
 
     # to wake call reset() or init()
     def poweroff(self):
@@ -237,11 +404,9 @@ class EPD(FrameBuffer):
         Args:
             value: 背光等级 0 ~ 255
         """
-        self.bl.freq(1000)
         if value >= 0xff:
             value = 0xff
-        data = value * 0xffff >> 8
-        self.bl.duty_u16(data)
+        self.bl.duty_u16(value * 257)  # 0 ~ 255 乘以 257 正好对应 0 ~ 65535
 
     def circle(self, x, y, radius, c, section=100):
         """
@@ -252,15 +417,29 @@ class EPD(FrameBuffer):
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
         """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = super().pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+        self.register_updates(x - radius, y - radius, x + radius, y + radius)
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -272,12 +451,22 @@ class EPD(FrameBuffer):
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
\ No newline at end of file
+        # MONO_HLSB 按行存储，使用中点画圆法逐行绘制水平线，超出画布的部分由 hline 裁剪
+        hline = super().hline
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            hline(x - _x, y + _y, 2 * _x + 1, c)
+            if _y:
+                hline(x - _x, y - _y, 2 * _x + 1, c)
+            if err >= 0:  # _x 即将减小，此时 _y 为第 _x 行的最大半宽
+                hline(x - _y, y + _x, 2 * _y + 1, c)
+                hline(x - _y, y - _x, 2 * _y + 1, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+        self.register_updates(x - radius, y - radius, x + radius, y + radius)
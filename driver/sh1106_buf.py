@@ -1,6 +1,6 @@
 import time
-import math
 import framebuf
+import micropython
 from machine import Pin
 from micropython import const
 
@@ -15,6 +15,28 @@ _HIGH_COLUMN_ADDRESS = const(0x10)
 _SET_PAGE_ADDRESS = const(0xB0)
 
 
+@micropython.viper
+def _transpose(rb: ptr8, db: ptr8, w: int, p: int):
+    # 将 HMSB 渲染缓冲区逐字节重排为 VLSB 显示缓冲区，拆成两层循环以避免除法和取余
+    for r in range(p):
+        i = r
+        o = w * r
+        for q in range(w):
+            db[o + q] = rb[i]
+            i += p
+
+
+@micropython.viper
+def _sync(buf: ptr8, shadow: ptr8, start: int, end: int) -> int:
+    # 逐字节比较 buf[start:end] 与上次发送的副本，有变化时更新副本并返回 1
+    changed = 0
+    for i in range(start, end):
+        if buf[i] != shadow[i]:
+            shadow[i] = buf[i]
+            changed = 1
+    return changed
+
+
 class SH1106(framebuf.FrameBuffer):
     def __init__(self, width, height, external_vcc, rotate=0):
         self.width = width
@@ -26,6 +48,8 @@ class SH1106(framebuf.FrameBuffer):
         self.bufsize = self.pages * self.width
         self.buffer = bytearray(self.bufsize)
         self.pages_to_update = 0
+        self._page_hdrs = [self._page_header(page) for page in range(self.pages)]  # 每页的地址命令，只生成一次
+        self._sent = bytearray(self.bufsize)  # 上次发送到屏幕的内容副本，用于判断页面内容是否发生变化
 
         if self.rotate90:
             self.displaybuf = bytearray(self.bufsize)
@@ -38,6 +62,7 @@ class SH1106(framebuf.FrameBuffer):
             self.displaybuf = self.buffer
             super().__init__(self.buffer, self.width, self.height,
                              framebuf.MONO_VLSB)
+        self._dbmv = memoryview(self.displaybuf)  # 切片时不会复制数据
 
         # flip() was called rotate() once, provide backwards compatibility.
         self.rotate = self.flip
@@ -47,7 +72,7 @@ class SH1106(framebuf.FrameBuffer):
     def init_display(self):
         self.reset()
         self.fill(0)
-        self.show()
+        self.show(True)  # 屏幕内容未知，与副本比较无意义，需要完整发送
         self.poweron()
         # rotate90 requires a call to flip() for setting up.
         self.flip(self.flip_en)
@@ -122,22 +147,23 @@ class SH1106(framebuf.FrameBuffer):
 
     def show(self, full_update=False):
         # self.* lookups in loops take significant time (~4fps).
-        (w, p, db, rb) = (self.width, self.pages,
-                          self.displaybuf, self.buffer)
+        (w, p, db, rb, mv) = (self.width, self.pages,
+                              self.displaybuf, self.buffer, self._dbmv)
+        (sent, write_page) = (self._sent, self.write_page)
         if self.rotate90:
-            for i in range(self.bufsize):
-                db[w * (i % p) + (i // p)] = rb[i]
-        if full_update:
-            pages_to_update = (1 << self.pages) - 1
+            _transpose(rb, db, w, p)
+        if full_update or self.rotate90:
+            # rotate90 时绘图坐标与显示页不对应，检查所有页，与上次发送的内容比较后决定是否发送
+            pages_to_update = (1 << p) - 1
         else:
             pages_to_update = self.pages_to_update
         # print("Updating pages: {:08b}".format(pages_to_update))
-        for page in range(self.pages):
+        for page in range(p):
             if (pages_to_update & (1 << page)):
-                self.write_cmd(_SET_PAGE_ADDRESS | page)
-                self.write_cmd(_LOW_COLUMN_ADDRESS | 2)
-                self.write_cmd(_HIGH_COLUMN_ADDRESS | 0)
-                self.write_data(db[(w * page):(w * page + w)])
+                # 内容与上次发送的相同时跳过该页，full_update 时总是发送
+                start = w * page
+                if _sync(db, sent, start, start + w) or full_update:
+                    write_page(page, mv[start:start + w])
         self.pages_to_update = 0
 
     def pixel(self, x, y, color=None):
@@ -194,15 +220,29 @@ class SH1106(framebuf.FrameBuffer):
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
         """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = super().pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+        self.register_updates(y - radius, y + radius)
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -214,15 +254,25 @@ class SH1106(framebuf.FrameBuffer):
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
+        # 中点画圆法逐行绘制水平线，只使用整数运算，超出画布的部分由 hline 裁剪
+        hline = super().hline
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            hline(x - _x, y + _y, 2 * _x + 1, c)
+            if _y:
+                hline(x - _x, y - _y, 2 * _x + 1, c)
+            if err >= 0:  # _x 即将减小，此时 _y 为第 _x 行的最大半宽
+                hline(x - _y, y + _x, 2 * _y + 1, c)
+                hline(x - _y, y - _x, 2 * _y + 1, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+        self.register_updates(y - radius, y + radius)
 
     def register_updates(self, y0, y1=None):
         # this function takes the top and optional bottom address of the changes made
@@ -257,6 +307,7 @@ class SH1106_I2C(SH1106):
             self.res = Pin(res, Pin.OUT, Pin.PULL_DOWN)
 
         self.temp = bytearray(2)
+        self.write_list = [b"\x40", None]  # Co=0, D/C#=1
         self.delay = delay
         super().__init__(width, height, external_vcc, rotate)
 
@@ -266,7 +317,25 @@ class SH1106_I2C(SH1106):
         self.i2c.writeto(self.addr, self.temp)
 
     def write_data(self, buf):
-        self.i2c.writeto(self.addr, b'\x40' + buf)
+        self.write_list[1] = buf
+        self.i2c.writevto(self.addr, self.write_list)
+
+    def _page_header(self, page):
+        # 每个命令字节前加 Co=1 控制字节，最后的 0x40 (Co=0, D/C#=1) 之后均为数据
+        return bytes((0x80, _SET_PAGE_ADDRESS | page,
+                      0x80, _LOW_COLUMN_ADDRESS | 2,
+                      0x80, _HIGH_COLUMN_ADDRESS | 0,
+                      0x40))
+
+    def write_page(self, page, buf):
+        """
+        在一次 I2C 传输中设置页地址和列地址并写入一页数据
+
+        Args:
+            page: 页号
+            buf: 该页的数据
+        """
+        self.i2c.writevto(self.addr, (self._page_hdrs[page], buf))
 
     def reset(self):
         super().reset(self.res)
@@ -285,19 +354,21 @@ class SH1106_SPI(SH1106):
             self.cs = int
         else:
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN)
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
         self.delay = delay
         super().__init__(width, height, external_vcc, rotate)
 
     def write_cmd(self, cmd):
+        self._cmd_buf[0] = cmd
         if self.cs is not None:
             self.cs(1)
             self.dc(0)
             self.cs(0)
-            self.spi.write(bytearray([cmd]))
+            self.spi.write(self._cmd_buf)
             self.cs(1)
         else:
             self.dc(0)
-            self.spi.write(bytearray([cmd]))
+            self.spi.write(self._cmd_buf)
 
     def write_data(self, buf):
         if self.cs is not None:
@@ -310,5 +381,24 @@ class SH1106_SPI(SH1106):
             self.dc(1)
             self.spi.write(buf)
 
+    def _page_header(self, page):
+        return bytes((_SET_PAGE_ADDRESS | page, _LOW_COLUMN_ADDRESS | 2, _HIGH_COLUMN_ADDRESS | 0))
+
+    def write_page(self, page, buf):
+        """
+        在一次 SPI 传输中设置页地址和列地址并写入一页数据
+
+        Args:
+            page: 页号
+            buf: 该页的数据
+        """
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(self._page_hdrs[page])
+        self.dc(1)
+        self.spi.write(buf)
+        self.cs(1)
+
     def reset(self):
         super().reset(self.res)
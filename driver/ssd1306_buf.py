@@ -1,6 +1,5 @@
 # 来源：https://pypi.org/project/micropython-ssd1306/
 # MicroPython SSD1306 OLED driver, I2C and SPI interfaces
-import math
 import framebuf
 from machine import Pin
 from micropython import const
@@ -39,7 +38,7 @@ class SSD1306(framebuf.FrameBuffer):
         self.rotate(rotate)
 
     def init_display(self):
-        for cmd in (
+        self.write_cmd_list((
                 SET_DISP | 0x00,  # off
                 # address setting
                 SET_MEM_ADDR, 0x00,  # horizontal
@@ -66,8 +65,7 @@ class SSD1306(framebuf.FrameBuffer):
                 SET_CHARGE_PUMP,
                 0x10 if self.external_vcc else 0x14,
                 SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+        ))  # on
         self.fill(0)
         self.show()
 
@@ -121,12 +119,7 @@ class SSD1306(framebuf.FrameBuffer):
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
             x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
+        self.write_cmd_list((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
         self.write_data(self.buffer)
 
     def back_light(self, value):
@@ -147,15 +140,28 @@ class SSD1306(framebuf.FrameBuffer):
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
         """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = self.pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -167,15 +173,24 @@ class SSD1306(framebuf.FrameBuffer):
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
+        # 中点画圆法逐行绘制水平线，只使用整数运算，超出画布的部分由 hline 裁剪
+        hline = self.hline
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            hline(x - _x, y + _y, 2 * _x + 1, c)
+            if _y:
+                hline(x - _x, y - _y, 2 * _x + 1, c)
+            if err >= 0:  # _x 即将减小，此时 _y 为第 _x 行的最大半宽
+                hline(x - _y, y + _x, 2 * _y + 1, c)
+                hline(x - _y, y - _x, 2 * _y + 1, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
 
 
 class SSD1306_I2C(SSD1306):
@@ -195,6 +210,24 @@ class SSD1306_I2C(SSD1306):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
+    def write_cmd_list(self, cmds):
+        self.i2c.writevto(self.addr, (b"\x00", bytes(cmds)))  # Co=0, D/C#=0
+
+    def init_display(self):
+        # show() 专用的数据列表，缓冲区不会重新分配，因此只需创建一次
+        self._show_list = [b"\x40", memoryview(self.buffer)]  # Co=0, D/C#=1
+        super().init_display()
+
+    def show(self):
+        x0 = 0
+        x1 = self.width - 1
+        if self.width == 64:
+            # displays with width of 64 pixels are shifted by 32
+            x0 += 32
+            x1 += 32
+        self.write_cmd_list((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
+        self.i2c.writevto(self.addr, self._show_list)
+
 
 class SSD1306_SPI(SSD1306):
     def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
@@ -206,9 +239,9 @@ class SSD1306_SPI(SSD1306):
         else:
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN)
         self.spi = spi
-        self.dc = dc
-        self.res = res
-        self.cs = cs
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)  # 仅在初始化时配置一次 SPI
+        self._spi_write = self.spi.write  # 缓存绑定方法，减少属性查找
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
         import time
         self.res(1)
         time.sleep_ms(1)
@@ -218,17 +251,23 @@ class SSD1306_SPI(SSD1306):
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self._cmd_buf[0] = cmd
+        self._spi_write(self._cmd_buf)
         self.cs(1)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(1)
         self.cs(0)
-        self.spi.write(buf)
+        self._spi_write(buf)
+        self.cs(1)
+
+    def write_cmd_list(self, cmds):
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self._spi_write(bytes(cmds))
         self.cs(1)
@@ -1,5 +1,4 @@
 # MicroPython SSD1315 OLED driver, I2C and SPI interfaces
-import math
 import framebuf
 from micropython import const
 
@@ -36,7 +35,7 @@ class SSD1315(framebuf.FrameBuffer):
         self.init_display()
 
     def init_display(self):
-        for cmd in (
+        self.write_cmd_list((
                 SET_DISP | 0x00,  # off
                 # address setting
                 SET_MEM_ADDR,
@@ -67,8 +66,7 @@ class SSD1315(framebuf.FrameBuffer):
                 SET_CHARGE_PUMP,
                 0x10 if self.external_vcc else 0x14,
                 SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+        ))  # on
         self.fill(0)
         self.show()
 
@@ -92,12 +90,7 @@ class SSD1315(framebuf.FrameBuffer):
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
             x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
+        self.write_cmd_list((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
         self.write_data(self.buffer)
 
     def back_light(self, value):
@@ -127,6 +120,24 @@ class SSD1315_I2C(SSD1315):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
+    def write_cmd_list(self, cmds):
+        self.i2c.writevto(self.addr, (b"\x00", bytes(cmds)))  # Co=0, D/C#=0
+
+    def init_display(self):
+        # show() 专用的数据列表，缓冲区不会重新分配，因此只需创建一次
+        self._show_list = [b"\x40", memoryview(self.buffer)]  # Co=0, D/C#=1
+        super().init_display()
+
+    def show(self):
+        x0 = 0
+        x1 = self.width - 1
+        if self.width == 64:
+            # displays with width of 64 pixels are shifted by 32
+            x0 += 32
+            x1 += 32
+        self.write_cmd_list((SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, 0, self.pages - 1))
+        self.i2c.writevto(self.addr, self._show_list)
+
     def circle(self, center, radius, c, section=100):
         """
         画圆
@@ -135,15 +146,29 @@ class SSD1315_I2C(SSD1315):
             c: 颜色
             center: 中心(x, y)
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
         """
-        arr = []
-        for m in range(section + 1):
-            x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + center[0])
-            y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + center[1])
-            arr.append([x, y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = self.pixel
+        cx, cy = center
+        x = radius
+        y = 0
+        err = 1 - radius
+        while x >= y:
+            pixel(cx + x, cy + y, c)
+            pixel(cx - x, cy + y, c)
+            pixel(cx + x, cy - y, c)
+            pixel(cx - x, cy - y, c)
+            pixel(cx + y, cy + x, c)
+            pixel(cx - y, cy + x, c)
+            pixel(cx + y, cy - x, c)
+            pixel(cx - y, cy - x, c)
+            y += 1
+            if err < 0:
+                err += 2 * y + 1
+            else:
+                x -= 1
+                err += 2 * (y - x) + 1
 
     def fill_circle(self, center, radius, c):
         """
@@ -154,15 +179,25 @@ class SSD1315_I2C(SSD1315):
             center: 中心(x, y)
             radius: 半径
         """
-        rsq = radius * radius
-        for x in range(radius):
-            y = int(math.sqrt(rsq - x * x))  # 计算 y 坐标
-            y0 = center[1] - y
-            end_y = y0 + y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(center[0] + x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(center[0] - x, y0, length, c)
+        # 中点画圆法逐行绘制水平线，只使用整数运算，超出画布的部分由 hline 裁剪
+        hline = self.hline
+        cx, cy = center
+        x = radius
+        y = 0
+        err = 1 - radius
+        while x >= y:
+            hline(cx - x, cy + y, 2 * x + 1, c)
+            if y:
+                hline(cx - x, cy - y, 2 * x + 1, c)
+            if err >= 0:  # x 即将减小，此时 y 为第 x 行的最大半宽
+                hline(cx - y, cy + x, 2 * y + 1, c)
+                hline(cx - y, cy - x, 2 * y + 1, c)
+            y += 1
+            if err < 0:
+                err += 2 * y + 1
+            else:
+                x -= 1
+                err += 2 * (y - x) + 1
 
 
 
@@ -173,6 +208,9 @@ class SSD1315_SPI(SSD1315):
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
         self.spi = spi
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)  # 仅在初始化时配置一次 SPI
+        self._spi_write = self.spi.write  # 缓存绑定方法，减少属性查找
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
         self.dc = dc
         self.res = res
         self.cs = cs
@@ -186,19 +224,25 @@ class SSD1315_SPI(SSD1315):
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self._cmd_buf[0] = cmd
+        self._spi_write(self._cmd_buf)
         self.cs(1)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(1)
         self.cs(0)
-        self.spi.write(buf)
+        self._spi_write(buf)
+        self.cs(1)
+
+    def write_cmd_list(self, cmds):
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self._spi_write(bytes(cmds))
         self.cs(1)
 
     def circle(self, center, radius, c, section=100):
@@ -209,15 +253,29 @@ class SSD1315_SPI(SSD1315):
             c: 颜色
             center: 中心(x, y)
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
         """
-        arr = []
-        for m in range(section + 1):
-            x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + center[0])
-            y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + center[1])
-            arr.append([x, y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = self.pixel
+        cx, cy = center
+        x = radius
+        y = 0
+        err = 1 - radius
+        while x >= y:
+            pixel(cx + x, cy + y, c)
+            pixel(cx - x, cy + y, c)
+            pixel(cx + x, cy - y, c)
+            pixel(cx - x, cy - y, c)
+            pixel(cx + y, cy + x, c)
+            pixel(cx - y, cy + x, c)
+            pixel(cx + y, cy - x, c)
+            pixel(cx - y, cy - x, c)
+            y += 1
+            if err < 0:
+                err += 2 * y + 1
+            else:
+                x -= 1
+                err += 2 * (y - x) + 1
 
     def fill_circle(self, center, radius, c):
         """
@@ -228,12 +286,22 @@ class SSD1315_SPI(SSD1315):
             center: 中心(x, y)
             radius: 半径
         """
-        rsq = radius * radius
-        for x in range(radius):
-            y = int(math.sqrt(rsq - x * x))  # 计算 y 坐标
-            y0 = center[1] - y
-            end_y = y0 + y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(center[0] + x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(center[0] - x, y0, length, c)
\ No newline at end of file
+        # 中点画圆法逐行绘制水平线，只使用整数运算，超出画布的部分由 hline 裁剪
+        hline = self.hline
+        cx, cy = center
+        x = radius
+        y = 0
+        err = 1 - radius
+        while x >= y:
+            hline(cx - x, cy + y, 2 * x + 1, c)
+            if y:
+                hline(cx - x, cy - y, 2 * x + 1, c)
+            if err >= 0:  # x 即将减小，此时 y 为第 x 行的最大半宽
+                hline(cx - y, cy + x, 2 * y + 1, c)
+                hline(cx - y, cy - x, 2 * y + 1, c)
+            y += 1
+            if err < 0:
+                err += 2 * y + 1
+            else:
+                x -= 1
+                err += 2 * (y - x) + 1
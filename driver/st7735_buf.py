@@ -9,9 +9,10 @@
 # https://blog.csdn.net/weixin_57604547/article/details/120535485
 # https://github.com/cheungbx/st7735-esp8266-micropython/blob/master/st7735.py
 import gc
-import math
 import framebuf
-from struct import pack
+import micropython
+from array import array
+from struct import pack_into
 from machine import Pin, PWM
 from micropython import const
 from time import sleep_us, sleep_ms
@@ -61,33 +62,56 @@ _ENCODE_POS = ">HH"
 _DECODE_PIXEL = ">BBB"
 
 _BUFFER_SIZE = const(256)
+_SPI_CHUNK = const(4096)  # show() 单次 SPI 传输的最大字节数
+_SCAN_SIZE = const(1024)  # show_region() 合并多行数据时使用的缓冲区大小
 
 GMCTRP1 = const(0xE0)
 GMCTRN1 = const(0xE1)
 
+# 初始化命令表，每项格式为 [命令, 参数长度, 参数...]，启动时在同一次片选内依次发送
+_INIT_SEQ = (
+    bytes((FRMCTR1, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR2, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR3, 6, 0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D)),
+    bytes((INVCTR, 1, 0x07)),
+    bytes((PWCTR1, 3, 0xA2, 0x02, 0x84)),
+    bytes((PWCTR2, 1, 0xC5)),
+    bytes((PWCTR3, 2, 0x0A, 0x00)),
+    bytes((PWCTR4, 2, 0x8A, 0x2A)),
+    bytes((PWCTR5, 2, 0x8A, 0xEE)),
+    bytes((VMCTR1, 1, 0x0E)),
+    bytes((COLMOD, 1, 0x05)),  # 16 位色
+)
+
+# Gamma 命令表，格式同 _INIT_SEQ，在设置旋转方向和反色之后发送
+_GAMMA_SEQ = (
+    bytes((GMCTRP1, 16, 0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29, 0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10)),
+    bytes((GMCTRN1, 16, 0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e, 0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10)),
+)
+
 # Rotation tables (width, height, xstart, ystart)
 
-SCREEN_128X160 = [(128, 160, 0, 0),
+SCREEN_128X160 = ((128, 160, 0, 0),
                   (160, 128, 0, 0),
                   (128, 160, 0, 0),
                   (160, 128, 0, 0),
                   (128, 160, 0, 0),
                   (160, 128, 0, 0),
-                  (128, 160, 0, 0)]
-SCREEN_128X128 = [(128, 128, 2, 1),
+                  (128, 160, 0, 0))
+SCREEN_128X128 = ((128, 128, 2, 1),
                   (128, 128, 1, 2),
                   (128, 128, 2, 3),
                   (128, 128, 3, 2),
                   (128, 128, 2, 1),
                   (128, 128, 1, 2),
-                  (128, 128, 2, 3)]
-SCREEN_80X160 = [(80, 160, 26, 1),
+                  (128, 128, 2, 3))
+SCREEN_80X160 = ((80, 160, 26, 1),
                  (160, 80, 1, 26),
                  (80, 160, 26, 1),
                  (160, 80, 1, 26),
                  (80, 160, 26, 1),
                  (160, 80, 1, 26),
-                 (80, 160, 26, 1)]
+                 (80, 160, 26, 1))
 # on MADCTL to control display rotation/color layout
 # Looking at display with pins on top.
 # 00 = upper left printing right
@@ -100,17 +124,89 @@ SCREEN_80X160 = [(80, 160, 26, 1),
 # 60 = 90 right rotation
 # C0 = 180 right rotation
 # A0 = 270 right rotation
-ROTATIONS = [0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80]  # 旋转方向
-
-
-def _encode_pos(x, y):
-    """Encode a postion into bytes."""
-    return pack(_ENCODE_POS, x, y)
-
-
-def _encode_pixel(c):
-    """Encode a pixel color into bytes."""
-    return pack(_ENCODE_PIXEL, c)
+ROTATIONS = (0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80)  # 旋转方向
+# 每种旋转方向对应的 MADCTL 参数，前半部分为 BGR，后半部分为 RGB
+_MADCTL = tuple(bytes([r | (0x00 if rgb else 0x08)]) for rgb in (False, True) for r in ROTATIONS)
+
+
+@micropython.viper
+def rgb_pack(r: ptr8, g: ptr8, b: ptr8, out):
+    """
+    将分开存放的 R、G、B 数据批量转换为大端 RGB565，写入 out
+
+    Args:
+        r: 红色分量 0-255
+        g: 绿色分量 0-255
+        b: 蓝色分量 0-255
+        out: 输出缓冲区，长度为像素数量的两倍
+    """
+    o = ptr8(out)
+    n = int(len(out)) >> 1
+    for i in range(n):
+        v = ((r[i] & 0xf8) << 8) | ((g[i] & 0xfc) << 3) | (b[i] >> 3)
+        o[2 * i] = v >> 8
+        o[2 * i + 1] = v & 0xff
+
+
+@micropython.viper
+def _fill_circle(buf: ptr16, args: ptr32):
+    """
+    直接在 RGB565 帧缓冲区中绘制填充圆，超出画布的部分会被裁剪
+
+    Args:
+        buf: 帧缓冲区
+        args: 参数数组 [宽度, 高度, 圆心 x, 圆心 y, 半径, 颜色]（viper 函数最多只能有 4 个参数）
+    """
+    w = args[0]
+    h = args[1]
+    cx = args[2]
+    cy = args[3]
+    r = args[4]
+    c = args[5]
+    # 中点画圆法，每次迭代得到一至两组 (行偏移, 半宽)，每组绘制上下对称的两行
+    x = r
+    y = 0
+    err = 1 - r
+    while x >= y:
+        n = 1
+        if err >= 0:  # x 即将减小，此时 y 为第 x 行的最大半宽
+            n = 2
+        k = 0
+        while k < n:
+            if k:
+                dy = x
+                hw = y
+            else:
+                dy = y
+                hw = x
+            x0 = cx - hw
+            x1 = cx + hw
+            if x0 < 0:
+                x0 = 0
+            if x1 >= w:
+                x1 = w - 1
+            if x0 <= x1:
+                row = cy + dy
+                if row >= 0 and row < h:
+                    i = row * w + x0
+                    end = row * w + x1
+                    while i <= end:
+                        buf[i] = c
+                        i += 1
+                row = cy - dy
+                if dy and row >= 0 and row < h:
+                    i = row * w + x0
+                    end = row * w + x1
+                    while i <= end:
+                        buf[i] = c
+                        i += 1
+            k += 1
+        y += 1
+        if err < 0:
+            err += 2 * y + 1
+        else:
+            x -= 1
+            err += 2 * (y - x) + 1
 
 
 class ST7735(framebuf.FrameBuffer):
@@ -135,6 +231,9 @@ class ST7735(framebuf.FrameBuffer):
         self.height = height
         self.x_start = 0
         self.y_start = 0
+        self._pos_buf = bytearray(4)  # CASET / RASET 参数缓冲区，避免每次设置窗口时分配内存
+        self._circle_args = array('i', (0, 0, 0, 0, 0, 0))  # fill_circle() 的参数数组
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
         self.spi = spi
         self.res = Pin(res, Pin.OUT, Pin.PULL_DOWN)
         self.dc = Pin(dc, Pin.OUT, Pin.PULL_DOWN)
@@ -142,43 +241,48 @@ class ST7735(framebuf.FrameBuffer):
             self.cs = int
         else:
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN)
+        # 缓存引脚的 on / off 绑定方法，减少每次 SPI 传输时的调用开销
+        self._dc0 = self.dc.off
+        self._dc1 = self.dc.on
+        if cs is None:
+            self._cs0 = self._cs1 = int
+        else:
+            self._cs0 = self.cs.off
+            self._cs1 = self.cs.on
         if bl is not None:
             self.bl = PWM(Pin(bl, Pin.OUT))
+            self.bl.freq(1000)
             self.back_light(255)
         else:
             self.bl = None
-        self._rotate = rotate
+        if (width == 160 and height == 80) or (width == 80 and height == 160):
+            self._rot_table = SCREEN_80X160
+        elif (width == 160 and height == 128) or (width == 128 and height == 160):
+            self._rot_table = SCREEN_128X160
+        elif width == 128 and height == 128:
+            self._rot_table = SCREEN_128X128
+        else:
+            raise ValueError(
+                "Unsupported display. 128x160, 128x128 and 80x160 are supported."
+            )
+        self._rotate = None  # 由 rotate() 设置
+        self._dirty = None  # 自上次刷新以来被修改的区域 [x0, y0, x1, y1]
         self._rgb = rgb
         self.hard_reset()
         self.soft_reset()
         self.poweron()
         #
         sleep_us(300)
-        self._write(FRMCTR1, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR2, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR3, bytearray([0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D]))
-        sleep_us(10)
-        self._write(INVCTR, bytearray([0x07]))
-        self._write(PWCTR1, bytearray([0xA2, 0x02, 0x84]))
-        self._write(PWCTR2, bytearray([0xC5]))
-        self._write(PWCTR3, bytearray([0x0A, 0x00]))
-        self._write(PWCTR4, bytearray([0x8A, 0x2A]))
-        self._write(PWCTR5, bytearray([0x8A, 0xEE]))
-        self._write(VMCTR1, bytearray([0x0E]))
-        #
-        self._write(COLMOD, bytearray([0x05]))  # color mode
+        self._write_seq(_INIT_SEQ)
         sleep_ms(50)
         gc.collect()  # 垃圾收集
         self.buffer = bytearray(self.height * self.width * 2)
-        self.rotate(self._rotate)
+        self._mv = memoryview(self.buffer)  # 切片时不会复制数据
+        self._scan = memoryview(bytearray(_SCAN_SIZE))  # 合并窄区域的多行数据，减少 SPI 传输次数
+        self.rotate(rotate)
         self.invert(invert)
         sleep_ms(10)
-        self.write_cmd(GMCTRP1)
-        self.write_data(
-            bytearray([0x02, 0x1c, 0x07, 0x12, 0x37, 0x32, 0x29, 0x2d, 0x29, 0x25, 0x2b, 0x39, 0x00, 0x01, 0x03, 0x10]))
-        self.write_cmd(GMCTRN1)
-        self.write_data(
-            bytearray([0x03, 0x1d, 0x07, 0x06, 0x2e, 0x2c, 0x29, 0x2d, 0x2e, 0x2e, 0x37, 0x3f, 0x00, 0x00, 0x02, 0x10]))
+        self._write_seq(_GAMMA_SEQ)
         self.write_cmd(NORON)
         sleep_us(10)
         self.write_cmd(DISPON)
@@ -189,14 +293,32 @@ class ST7735(framebuf.FrameBuffer):
 
     def _write(self, command=None, data=None):
         """SPI write to the device: commands and data."""
-        self.cs(0)
+        self._cs0()
         if command is not None:
-            self.dc(0)
-            self.spi.write(bytes([command]))
+            self._dc0()
+            self._cmd_buf[0] = command
+            self.spi.write(self._cmd_buf)
         if data is not None:
-            self.dc(1)
+            self._dc1()
             self.spi.write(data)
-        self.cs(1)
+        self._cs1()
+
+    def _write_seq(self, seq):
+        """
+        在同一次片选内依次发送一组命令及参数
+
+        Args:
+            seq: 命令表，每项格式为 [命令, 参数长度, 参数...]
+        """
+        write = self.spi.write
+        self._cs0()
+        for e in seq:
+            self._dc0()
+            write(e[0:1])
+            if e[1]:
+                self._dc1()
+                write(e[2:2 + e[1]])
+        self._cs1()
 
     def write_cmd(self, cmd):
         """
@@ -205,10 +327,11 @@ class ST7735(framebuf.FrameBuffer):
         Args:
             cmd: 命令内容
         """
-        self.cs(0)
-        self.dc(0)
-        self.spi.write(bytes([cmd]))
-        self.cs(1)
+        self._cs0()
+        self._dc0()
+        self._cmd_buf[0] = cmd
+        self.spi.write(self._cmd_buf)
+        self._cs1()
 
     def write_data(self, data):
         """
@@ -217,10 +340,10 @@ class ST7735(framebuf.FrameBuffer):
         Args:
             data: 数据内容
         """
-        self.cs(0)
-        self.dc(1)
+        self._cs0()
+        self._dc1()
         self.spi.write(data)
-        self.cs(1)
+        self._cs1()
 
     def hard_reset(self):
         """
@@ -277,22 +400,16 @@ class ST7735(framebuf.FrameBuffer):
                 - 5-Upper left printing down (backwards) (Vertical flip)
                 - 6-Lower left printing right (backwards) (Y Flip)
         """
+        if rotate == self._rotate:
+            return  # 旋转方向未改变
+        size = (self.width, self.height)
+        first = self._rotate is None
+        self.width, self.height, self.x_start, self.y_start = self._rot_table[rotate]
         self._rotate = rotate
-        madctl = ROTATIONS[rotate]
-        if (self.width == 160 and self.height == 80) or (self.width == 80 and self.height == 160):
-            table = SCREEN_80X160
-        elif (self.width == 160 and self.height == 128) or (self.width == 128 and self.height == 160):
-            table = SCREEN_128X160
-        elif self.width == 128 and self.height == 128:
-            table = SCREEN_128X128
-        else:
-            raise ValueError(
-                "Unsupported display. 128x160, 128x128 and 80x160 are supported."
-            )
-
-        self.width, self.height, self.x_start, self.y_start = table[rotate]
-        super().__init__(self.buffer, self.width, self.height, framebuf.RGB565, self.width)
-        self._write(MADCTL, bytes([madctl | (0x00 if self._rgb else 0x08)]))
+        self._dirty = [0, 0, self.width - 1, self.height - 1]  # 旋转后需要重新发送整个画面
+        if first or size != (self.width, self.height):  # 仅在宽高改变时重新初始化 FrameBuffer
+            super().__init__(self.buffer, self.width, self.height, framebuf.RGB565, self.width)
+        self._write(MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + rotate])
 
     def _set_columns(self, start, end):
         """
@@ -303,8 +420,8 @@ class ST7735(framebuf.FrameBuffer):
             end (int): column end address
         """
         if start <= end <= self.width:
-            self._write(CASET, _encode_pos(
-                start + self.x_start, end + self.x_start))
+            pack_into(_ENCODE_POS, self._pos_buf, 0, start + self.x_start, end + self.x_start)
+            self._write(CASET, self._pos_buf)
 
     def _set_rows(self, start, end):
         """
@@ -315,8 +432,8 @@ class ST7735(framebuf.FrameBuffer):
             end (int): row end address
        """
         if start <= end <= self.height:
-            self._write(RASET, _encode_pos(
-                start + self.y_start, end + self.y_start))
+            pack_into(_ENCODE_POS, self._pos_buf, 0, start + self.y_start, end + self.y_start)
+            self._write(RASET, self._pos_buf)
 
     def set_window(self, x0, y0, x1, y1):
         """
@@ -329,9 +446,29 @@ class ST7735(framebuf.FrameBuffer):
             y1 (int): row end address
         """
         if x0 < self.width and y0 < self.height:
-            self._set_columns(x0, x1)
-            self._set_rows(y0, y1)
-            self._write(RAMWR)
+            # CASET、RASET 和 RAMWR 在同一次片选内发送，只通过 DC 区分命令和参数
+            cmd = self._cmd_buf
+            pos = self._pos_buf
+            write = self.spi.write
+            self._cs0()
+            if x0 <= x1 <= self.width:
+                self._dc0()
+                cmd[0] = CASET
+                write(cmd)
+                pack_into(_ENCODE_POS, pos, 0, x0 + self.x_start, x1 + self.x_start)
+                self._dc1()
+                write(pos)
+            if y0 <= y1 <= self.height:
+                self._dc0()
+                cmd[0] = RASET
+                write(cmd)
+                pack_into(_ENCODE_POS, pos, 0, y0 + self.y_start, y1 + self.y_start)
+                self._dc1()
+                write(pos)
+            self._dc0()
+            cmd[0] = RAMWR
+            write(cmd)
+            self._cs1()
 
     def clear(self):
         """
@@ -341,10 +478,185 @@ class ST7735(framebuf.FrameBuffer):
 
     def show(self):
         """
-        将帧缓冲区数据发送到屏幕
+        将帧缓冲区数据发送到屏幕，只发送自上次刷新以来被修改的区域
         """
-        self.set_window(0, 0, self.width - 1, self.height - 1)
-        self._write(RAMWR, self.buffer)
+        d = self._dirty
+        if d is None:
+            return  # 没有需要刷新的内容
+        self._dirty = None
+        x0, y0, x1, y1 = d
+        self.show_region(x0, y0, x1 - x0 + 1, y1 - y0 + 1)
+
+    def show_region(self, x, y, w, h):
+        """
+        仅将帧缓冲区中指定区域的数据发送到屏幕，适用于只有小部分画面发生变化的情况
+
+        Args:
+            x: 左上角 x 坐标
+            y: 左上角 y 坐标
+            w: 宽度
+            h: 高度
+        """
+        # 将区域限制在画布的范围内
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        if x + w > self.width:
+            w = self.width - x
+        if y + h > self.height:
+            h = self.height - y
+        if w <= 0 or h <= 0:
+            return
+        self.set_window(x, y, x + w - 1, y + h - 1)  # 已发送 RAMWR
+        mv = self._mv
+        write = self.spi.write
+        pitch = self.width * 2
+        self._cs0()
+        self._dc1()
+        if w == self.width:  # 整行区域在帧缓冲区中是连续的
+            end = (y + h) * pitch
+            for i in range(y * pitch, end, _SPI_CHUNK):
+                write(mv[i:min(i + _SPI_CHUNK, end)])
+        else:
+            # 每行数据不连续，先将多行复制到预先分配的缓冲区中再一起发送
+            scan = self._scan
+            n = w * 2
+            offset = y * pitch + x * 2
+            filled = 0
+            for _ in range(h):
+                if filled + n > _SCAN_SIZE:
+                    write(scan[:filled])
+                    filled = 0
+                scan[filled:filled + n] = mv[offset:offset + n]
+                filled += n
+                offset += pitch
+            write(scan[:filled])
+        self._cs1()
+
+    @micropython.native
+    def blit_bytes(self, raw, x, y, w, h):
+        """
+        将已编码为大端 RGB565 的原始数据逐行复制到帧缓冲区，无需逐像素转换
+
+        Args:
+            raw: 原始图像数据，长度为 w * h * 2
+            x: 左上角 x 坐标
+            y: 左上角 y 坐标
+            w: 宽度
+            h: 高度
+        """
+        # 将区域限制在画布的范围内
+        sx = -x if x < 0 else 0
+        sy = -y if y < 0 else 0
+        cols = min(w, self.width - x) - sx
+        rows = min(h, self.height - y) - sy
+        if cols <= 0 or rows <= 0:
+            return
+        mv = self._mv
+        src = memoryview(raw)
+        pitch = self.width * 2
+        n = cols * 2
+        dst = (y + sy) * pitch + (x + sx) * 2
+        offset = (sy * w + sx) * 2
+        for _ in range(rows):
+            mv[dst:dst + n] = src[offset:offset + n]
+            dst += pitch
+            offset += w * 2
+        self.register_updates(x, y, x + w - 1, y + h - 1)
+
+    def register_updates(self, x0, y0, x1, y1):
+        """
+        记录被修改的区域，show() 只发送该区域
+
+        Args:
+            x0: 左上角 x 坐标
+            y0: 左上角 y 坐标
+            x1: 右下角 x 坐标
+            y1: 右下角 y 坐标
+        """
+        if x0 > x1:
+            x0, x1 = x1, x0
+        if y0 > y1:
+            y0, y1 = y1, y0
+        # 将区域限制在画布的范围内
+        if x1 < 0 or y1 < 0 or x0 >= self.width or y0 >= self.height:
+            return
+        if x0 < 0:
+            x0 = 0
+        if y0 < 0:
+            y0 = 0
+        if x1 >= self.width:
+            x1 = self.width - 1
+        if y1 >= self.height:
+            y1 = self.height - 1
+        d = self._dirty
+        if d is None:
+            self._dirty = [x0, y0, x1, y1]
+        else:
+            if x0 < d[0]:
+                d[0] = x0
+            if y0 < d[1]:
+                d[1] = y0
+            if x1 > d[2]:
+                d[2] = x1
+            if y1 > d[3]:
+                d[3] = y1
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            return super().pixel(x, y)
+        super().pixel(x, y, c)
+        self.register_updates(x, y, x, y)
+
+    def text(self, s, x, y, c=1):
+        super().text(s, x, y, c)
+        self.register_updates(x, y, x + len(s) * 8 - 1, y + 7)
+
+    def line(self, x0, y0, x1, y1, c):
+        super().line(x0, y0, x1, y1, c)
+        self.register_updates(x0, y0, x1, y1)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self.register_updates(x, y, x + w - 1, y)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self.register_updates(x, y, x, y + h - 1)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            super().fill_rect(x, y, w, h, c)
+        else:
+            super().rect(x, y, w, h, c)
+        self.register_updates(x, y, x + w - 1, y + h - 1)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self.register_updates(x, y, x + w - 1, y + h - 1)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self.register_updates(x - xr, y - yr, x + xr, y + yr)
+
+    def poly(self, x, y, coords, c, *args):
+        super().poly(x, y, coords, c, *args)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
+
+    def fill(self, c):
+        super().fill(c)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        super().blit(fbuf, x, y, key, palette)
+        self.register_updates(x, y, self.width - 1, self.height - 1)
+
+    def scroll(self, x, y):
+        super().scroll(x, y)
+        self._dirty = [0, 0, self.width - 1, self.height - 1]
 
     # @staticmethod
     # def color(r, g, b):
@@ -359,14 +671,16 @@ class ST7735(framebuf.FrameBuffer):
             enable: RGB else BGR
         """
         self._rgb = enable
-        self._write(MADCTL, bytes([ROTATIONS[self._rotation] | (0x00 if self._rgb else 0x08)]))
+        self._write(MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + self._rotate])
 
     @staticmethod
-    def color(r, g, b):
+    @micropython.viper
+    def color(r: int, g: int, b: int) -> int:
         """
         Convert red, green and blue values (0-255) into a 16-bit 565 encoding.
         """
-        return (r & 0xf8) << 8 | (g & 0xfc) << 3 | b >> 3
+        # viper 将纯整数运算编译为机器码，批量转换颜色时明显更快
+        return ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
 
     def back_light(self, value):
         """
@@ -375,11 +689,9 @@ class ST7735(framebuf.FrameBuffer):
         Args:
             value: 背光等级 0 ~ 255
         """
-        self.bl.freq(1000)
         if value >= 0xff:
             value = 0xff
-        data = value * 0xffff >> 8
-        self.bl.duty_u16(data)
+        self.bl.duty_u16(value * 257)  # 0 ~ 255 乘以 257 正好对应 0 ~ 65535
 
     def circle(self, x, y, radius, c, section=100):
         """
@@ -390,15 +702,29 @@ class ST7735(framebuf.FrameBuffer):
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
-        """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+            section: 分段（已不再使用，仅为兼容保留）
+        """
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = super().pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+        self.register_updates(x - radius, y - radius, x + radius, y + radius)
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -410,15 +736,16 @@ class ST7735(framebuf.FrameBuffer):
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
+        # 由 viper 函数直接写入帧缓冲区，避免逐行调用 hline
+        args = self._circle_args
+        args[0] = self.width
+        args[1] = self.height
+        args[2] = x
+        args[3] = y
+        args[4] = radius
+        args[5] = c
+        _fill_circle(self.buffer, args)
+        self.register_updates(x - radius, y - radius, x + radius, y + radius)
 
     # def image(self, file_name):
     #     with open(file_name, "rb") as bmp:
@@ -9,9 +9,10 @@
 # https://github.com/AntonVanke/MicroPython-uFont
 # https://github.com/cheungbx/st7735-esp8266-micropython/blob/master/st7735.py
 import gc
-import math
 import framebuf
-from struct import pack
+import micropython
+from array import array
+from struct import pack_into
 from machine import Pin, PWM
 from micropython import const
 from time import sleep_us, sleep_ms
@@ -91,6 +92,21 @@ _DECODE_PIXEL = ">BBB"
 
 _BUFFER_SIZE = const(256)
 
+# 初始化命令表，每项格式为 [命令, 参数长度, 参数...]，启动时在同一次片选内依次发送
+_INIT_SEQ = (
+    bytes((FRMCTR1, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR2, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR3, 6, 0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D)),
+    bytes((INVCTR, 1, 0x07)),
+    bytes((PWCTR1, 3, 0xA2, 0x02, 0x84)),
+    bytes((PWCTR2, 1, 0xC5)),
+    bytes((PWCTR3, 2, 0x0A, 0x00)),
+    bytes((PWCTR4, 2, 0x8A, 0x2A)),
+    bytes((PWCTR5, 2, 0x8A, 0xEE)),
+    bytes((VMCTR1, 1, 0x0E)),
+    bytes((ST7789_COLMOD, 1, (COLOR_MODE_65K | COLOR_MODE_16BIT) & 0x77)),
+)
+
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
 _BIT5 = const(0x20)
@@ -135,22 +151,133 @@ WIDTH_135 = [(135, 240, 52, 40),
 # 60 = 90 right rotation
 # C0 = 180 right rotation
 # A0 = 270 right rotation
-ROTATIONS = [0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80]  # 旋转方向
-
-
-def _encode_pos(x, y):
-    """Encode a postion into bytes."""
-    return pack(_ENCODE_POS, x, y)
-
-
-def _encode_pixel(c):
-    """Encode a pixel color into bytes."""
-    return pack(_ENCODE_PIXEL, c)
+ROTATIONS = (0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80)  # 旋转方向
+# 每种旋转方向对应的 MADCTL 参数，前半部分为 BGR，后半部分为 RGB
+_MADCTL = tuple(bytes([r | (0x00 if rgb else 0x08)]) for rgb in (False, True) for r in ROTATIONS)
+
+
+@micropython.viper
+def rgb888_to_rgb565(src: ptr8, dst):
+    """
+    将 RGB888 数据批量转换为大端 RGB565，写入 dst
+
+    Args:
+        src: RGB888 数据，每个像素依次为 R、G、B 三个字节
+        dst: 输出缓冲区，长度为像素数量的两倍
+    """
+    o = ptr8(dst)
+    n = int(len(dst)) >> 1
+    for i in range(n):
+        j = 3 * i
+        v = ((src[j] & 0xf8) << 8) | ((src[j + 1] & 0xfc) << 3) | (src[j + 2] >> 3)
+        o[2 * i] = v >> 8
+        o[2 * i + 1] = v & 0xff
+
+
+@micropython.viper
+def _pack_pos(buf: ptr8, start: int, end: int):
+    """
+    以大端格式将起止地址写入 buf[0:4]，代替 struct.pack_into
+
+    Args:
+        buf: 输出缓冲区
+        start: 起始地址
+        end: 结束地址
+    """
+    buf[0] = start >> 8
+    buf[1] = start & 0xff
+    buf[2] = end >> 8
+    buf[3] = end & 0xff
+
+
+@micropython.viper
+def _plot(buf: ptr16, size: int, pts: ptr32, n: int):
+    """
+    将一组像素直接写入 RGB565 帧缓冲区，超出画布的像素会被忽略
+
+    Args:
+        buf: 帧缓冲区
+        size: 画布尺寸，(宽度 << 16) | 高度
+        pts: 像素数组 [x0, y0, c0, x1, y1, c1, ...]
+        n: 像素数量
+    """
+    w = size >> 16
+    h = size & 0xffff
+    i = 0
+    end = n * 3
+    while i < end:
+        x = pts[i]
+        y = pts[i + 1]
+        if x >= 0 and x < w and y >= 0 and y < h:
+            buf[y * w + x] = pts[i + 2]
+        i += 3
+
+
+@micropython.viper
+def _fill_circle(buf: ptr16, args: ptr32):
+    """
+    直接在 RGB565 帧缓冲区中绘制填充圆，超出画布的部分会被裁剪
+
+    Args:
+        buf: 帧缓冲区
+        args: 参数数组 [宽度, 高度, 圆心 x, 圆心 y, 半径, 颜色]（viper 函数最多只能有 4 个参数）
+    """
+    w = args[0]
+    h = args[1]
+    cx = args[2]
+    cy = args[3]
+    r = args[4]
+    c = args[5]
+    # 中点画圆法，每次迭代得到一至两组 (行偏移, 半宽)，每组绘制上下对称的两行
+    x = r
+    y = 0
+    err = 1 - r
+    while x >= y:
+        n = 1
+        if err >= 0:  # x 即将减小，此时 y 为第 x 行的最大半宽
+            n = 2
+        k = 0
+        while k < n:
+            if k:
+                dy = x
+                hw = y
+            else:
+                dy = y
+                hw = x
+            x0 = cx - hw
+            x1 = cx + hw
+            if x0 < 0:
+                x0 = 0
+            if x1 >= w:
+                x1 = w - 1
+            if x0 <= x1:
+                row = cy + dy
+                if row >= 0 and row < h:
+                    i = row * w + x0
+                    end = row * w + x1
+                    while i <= end:
+                        buf[i] = c
+                        i += 1
+                row = cy - dy
+                if dy and row >= 0 and row < h:
+                    i = row * w + x0
+                    end = row * w + x1
+                    while i <= end:
+                        buf[i] = c
+                        i += 1
+            k += 1
+        y += 1
+        if err < 0:
+            err += 2 * y + 1
+        else:
+            x -= 1
+            err += 2 * (y - x) + 1
 
 
 class ST7789(framebuf.FrameBuffer):
     def __init__(self, width: int, height: int, spi, res: int, dc: int,
-                 cs: int = None, bl: int = None, rotate: int = 0, rgb: bool = True, invert: bool = True):
+                 cs: int = None, bl: int = None, rotate: int = 0, rgb: bool = True, invert: bool = True,
+                 spi_chunk: int = 0):
         """
         初始化屏幕驱动
 
@@ -165,11 +292,24 @@ class ST7789(framebuf.FrameBuffer):
             rotate: 旋转图像，数值为 0-6
             rgb: 使用 RGB 颜色模式，而不是 BGR
             invert: 反转颜色
+            spi_chunk: 单次 SPI 传输的最大字节数，0 表示不限制（若 SPI 实例提供 max_transfer_size 则使用该值）
         """
         self.width = width
         self.height = height
         self.x_start = 0
         self.y_start = 0
+        self._circle_args = array('i', (0, 0, 0, 0, 0, 0))  # fill_circle() 的参数数组
+        self._last_win = None  # 屏幕当前的窗口 (x0, y0, x1, y1)，未知时为 None
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
+        self._pos_buf = bytearray(4)  # CASET / RASET 参数缓冲区，避免每次设置窗口时分配内存
+        # 设置窗口的命令和参数: [CASET][x0, x1][RASET][y0, y1][RAMWR]，预先切片以免每次分配内存
+        self._win_buf = bytearray((ST7789_CASET, 0, 0, 0, 0, ST7789_RASET, 0, 0, 0, 0, ST7789_RAMWR))
+        mv = memoryview(self._win_buf)
+        self._win_parts = (mv[0:1], mv[1:5], mv[5:6], mv[6:10], mv[10:11])
+        # show() 专用的全屏窗口命令，格式同上，只在旋转时更新坐标
+        self._show_hdr = bytearray(self._win_buf)
+        mv = memoryview(self._show_hdr)
+        self._show_parts = (mv[0:1], mv[1:5], mv[5:6], mv[6:10], mv[10:11])
         self.spi = spi
         self.res = Pin(res, Pin.OUT, Pin.PULL_DOWN)
         self.dc = Pin(dc, Pin.OUT, Pin.PULL_DOWN)
@@ -177,8 +317,19 @@ class ST7789(framebuf.FrameBuffer):
             self.cs = int
         else:
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN)
+        # 缓存引脚的 on / off 绑定方法和 SPI 写入方法，减少每次 SPI 传输时的属性查找
+        self._dc0 = self.dc.off
+        self._dc1 = self.dc.on
+        if cs is None:
+            self._cs0 = self._cs1 = int
+        else:
+            self._cs0 = self.cs.off
+            self._cs1 = self.cs.on
+        self._spi_write = spi.write
+        self._spi_max = spi_chunk or getattr(spi, 'max_transfer_size', 0) or 0  # show() 单次写入的最大字节数
         if bl is not None:
             self.bl = PWM(Pin(bl, Pin.OUT))
+            self.bl.freq(1000)
             self.back_light(255)
         else:
             self.bl = None
@@ -189,22 +340,11 @@ class ST7789(framebuf.FrameBuffer):
         self.poweron()
         #
         sleep_us(300)
-        self._write(FRMCTR1, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR2, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR3, bytearray([0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D]))
-        sleep_us(10)
-        self._write(INVCTR, bytearray([0x07]))
-        self._write(PWCTR1, bytearray([0xA2, 0x02, 0x84]))
-        self._write(PWCTR2, bytearray([0xC5]))
-        self._write(PWCTR3, bytearray([0x0A, 0x00]))
-        self._write(PWCTR4, bytearray([0x8A, 0x2A]))
-        self._write(PWCTR5, bytearray([0x8A, 0xEE]))
-        self._write(VMCTR1, bytearray([0x0E]))
-        #
-        self._set_color_mode(COLOR_MODE_65K | COLOR_MODE_16BIT)
+        self._write_seq(_INIT_SEQ)
         sleep_ms(50)
         gc.collect()  # 垃圾收集
         self.buffer = bytearray(self.height * self.width * 2)
+        self._mv = memoryview(self.buffer)  # 切片时不会复制数据
         self.rotate(self._rotate)
         self.invert(invert)
         sleep_ms(10)
@@ -218,14 +358,32 @@ class ST7789(framebuf.FrameBuffer):
 
     def _write(self, command=None, data=None):
         """SPI write to the device: commands and data."""
-        self.cs(0)
+        self._cs0()
         if command is not None:
-            self.dc(0)
-            self.spi.write(bytes([command]))
+            self._dc0()
+            self._cmd_buf[0] = command
+            self._spi_write(self._cmd_buf)
         if data is not None:
-            self.dc(1)
-            self.spi.write(data)
-        self.cs(1)
+            self._dc1()
+            self._spi_write(data)
+        self._cs1()
+
+    def _write_seq(self, seq):
+        """
+        在同一次片选内依次发送一组命令及参数
+
+        Args:
+            seq: 命令表，每项格式为 [命令, 参数长度, 参数...]
+        """
+        write = self._spi_write
+        self._cs0()
+        for e in seq:
+            self._dc0()
+            write(e[0:1])
+            if e[1]:
+                self._dc1()
+                write(e[2:2 + e[1]])
+        self._cs1()
 
     def write_cmd(self, cmd):
         """
@@ -234,10 +392,11 @@ class ST7789(framebuf.FrameBuffer):
         Args:
             cmd: 命令内容
         """
-        self.cs(0)
-        self.dc(0)
-        self.spi.write(bytes([cmd]))
-        self.cs(1)
+        self._cs0()
+        self._dc0()
+        self._cmd_buf[0] = cmd
+        self._spi_write(self._cmd_buf)
+        self._cs1()
 
     def write_data(self, data):
         """
@@ -246,29 +405,31 @@ class ST7789(framebuf.FrameBuffer):
         Args:
             data: 数据内容
         """
-        self.cs(0)
-        self.dc(1)
-        self.spi.write(data)
-        self.cs(1)
+        self._cs0()
+        self._dc1()
+        self._spi_write(data)
+        self._cs1()
 
     def hard_reset(self):
         """
         Hard reset display.
         """
-        self.cs(0)
+        self._cs0()
         self.res(1)
         sleep_ms(50)
         self.res(0)
         sleep_ms(50)
         self.res(1)
         sleep_ms(150)
-        self.cs(1)
+        self._cs1()
+        self._last_win = None
 
     def soft_reset(self):
         """
         Soft reset display.
         """
         self._write(ST7789_SWRESET)
+        self._last_win = None
         sleep_ms(150)
 
     def poweron(self):
@@ -318,7 +479,6 @@ class ST7789(framebuf.FrameBuffer):
                 - 6-Lower left printing right (backwards) (Y Flip)
         """
         self._rotate = rotate
-        madctl = ROTATIONS[rotate]
         if self.width == 320:
             table = WIDTH_320
         elif self.width == 240:
@@ -331,8 +491,12 @@ class ST7789(framebuf.FrameBuffer):
             )
 
         self.width, self.height, self.x_start, self.y_start = table[rotate]
+        self._last_win = None
         super().__init__(self.buffer, self.width, self.height, framebuf.RGB565, self.width)
-        self._write(ST7789_MADCTL, bytes([madctl | (0x00 if self._rgb else 0x08)]))
+        pack_into(_ENCODE_POS, self._show_hdr, 1, self.x_start, self.x_start + self.width - 1)
+        pack_into(_ENCODE_POS, self._show_hdr, 6, self.y_start, self.y_start + self.height - 1)
+        self._show_win = (0, 0, self.width - 1, self.height - 1)
+        self._write(ST7789_MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + rotate])
 
     def _set_columns(self, start, end):
         """
@@ -343,8 +507,9 @@ class ST7789(framebuf.FrameBuffer):
             end (int): column end address
         """
         if start <= end <= self.width:
-            self._write(ST7789_CASET, _encode_pos(
-                start + self.x_start, end + self.x_start))
+            _pack_pos(self._pos_buf, start + self.x_start, end + self.x_start)
+            self._write(ST7789_CASET, self._pos_buf)
+            self._last_win = None
 
     def _set_rows(self, start, end):
         """
@@ -355,8 +520,9 @@ class ST7789(framebuf.FrameBuffer):
             end (int): row end address
        """
         if start <= end <= self.height:
-            self._write(ST7789_RASET, _encode_pos(
-                start + self.y_start, end + self.y_start))
+            _pack_pos(self._pos_buf, start + self.y_start, end + self.y_start)
+            self._write(ST7789_RASET, self._pos_buf)
+            self._last_win = None
 
     def set_window(self, x0, y0, x1, y1):
         """
@@ -369,9 +535,28 @@ class ST7789(framebuf.FrameBuffer):
             y1 (int): row end address
         """
         if x0 < self.width and y0 < self.height:
-            self._set_columns(x0, x1)
-            self._set_rows(y0, y1)
-            self._write(ST7789_RAMWR)
+            # CASET、RASET 和 RAMWR 在同一次片选内发送，只通过 DC 区分命令和参数
+            caset, cols, raset, rows, ramwr = self._win_parts
+            write = self._spi_write
+            win = (x0, y0, x1, y1)
+            self._cs0()
+            if win != self._last_win:  # 窗口未改变时只需发送 RAMWR，写入位置会回到窗口起点
+                self._last_win = win
+                if x0 <= x1 <= self.width:
+                    _pack_pos(cols, x0 + self.x_start, x1 + self.x_start)
+                    self._dc0()
+                    write(caset)
+                    self._dc1()
+                    write(cols)
+                if y0 <= y1 <= self.height:
+                    _pack_pos(rows, y0 + self.y_start, y1 + self.y_start)
+                    self._dc0()
+                    write(raset)
+                    self._dc1()
+                    write(rows)
+            self._dc0()
+            write(ramwr)
+            self._cs1()
 
     def clear(self):
         """
@@ -383,8 +568,72 @@ class ST7789(framebuf.FrameBuffer):
         """
         将帧缓冲区数据发送到屏幕
         """
-        self.set_window(0, 0, self.width - 1, self.height - 1)  # 如果没有这行就会偏移
-        self.write_data(self.buffer)
+        # 窗口命令和帧缓冲区数据在同一次片选内发送，如果不设置窗口就会偏移
+        caset, cols, raset, rows, ramwr = self._show_parts
+        write = self._spi_write
+        dc0 = self._dc0
+        dc1 = self._dc1
+        self._cs0()
+        if self._last_win != self._show_win:  # 上一帧已设置全屏窗口时只需发送 RAMWR
+            self._last_win = self._show_win
+            dc0()
+            write(caset)
+            dc1()
+            write(cols)
+            dc0()
+            write(raset)
+            dc1()
+            write(rows)
+        dc0()
+        write(ramwr)
+        dc1()
+        mv = self._mv
+        step = self._spi_max
+        if step:  # SPI 后端限制了单次传输大小时，按上限分块发送，调用次数最少
+            for offset in range(0, len(mv), step):
+                write(mv[offset:offset + step])
+        else:  # 整个帧缓冲区一次发送
+            write(mv)
+        self._cs1()
+
+    def show_region(self, x, y, w, h):
+        """
+        仅将帧缓冲区中指定区域的数据发送到屏幕，适用于只有小部分画面发生变化的情况
+
+        Args:
+            x: 左上角 x 坐标
+            y: 左上角 y 坐标
+            w: 宽度
+            h: 高度
+        """
+        # 将区域限制在画布的范围内
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        if x + w > self.width:
+            w = self.width - x
+        if y + h > self.height:
+            h = self.height - y
+        if w <= 0 or h <= 0:
+            return
+        self.set_window(x, y, x + w - 1, y + h - 1)  # 已发送 RAMWR
+        mv = self._mv
+        write = self._spi_write
+        pitch = self.width * 2
+        self._cs0()
+        self._dc1()
+        if w == self.width:  # 整行区域在帧缓冲区中是连续的，一次发送
+            write(mv[y * pitch:(y + h) * pitch])
+        else:  # 逐行发送帧缓冲区切片，不复制数据
+            n = w * 2
+            offset = y * pitch + x * 2
+            for _ in range(h):
+                write(mv[offset:offset + n])
+                offset += pitch
+        self._cs1()
 
     def rgb(self, enable: bool):
         """
@@ -394,14 +643,31 @@ class ST7789(framebuf.FrameBuffer):
             enable: RGB else BGR
         """
         self._rgb = enable
-        self._write(ST7789_MADCTL, bytes([ROTATIONS[self._rotate] | (0x00 if self._rgb else 0x08)]))
+        self._write(ST7789_MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + self._rotate])
 
     @staticmethod
-    def color(r, g, b):
+    @micropython.viper
+    def color(r: int, g: int, b: int) -> int:
         """
         Convert red, green and blue values (0-255) into a 16-bit 565 encoding.
         """
-        return (r & 0xf8) << 8 | (g & 0xfc) << 3 | b >> 3
+        # viper 将纯整数运算编译为机器码，批量转换颜色时明显更快
+        return ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+
+    @staticmethod
+    def color_buf(src):
+        """
+        将 RGB888 数据批量转换为 RGB565 数据，可直接用于 blit_buffer
+
+        Args:
+            src: RGB888 数据，每个像素依次为 R、G、B 三个字节
+
+        Returns:
+            RGB565 数据
+        """
+        dst = bytearray(len(src) // 3 * 2)
+        rgb888_to_rgb565(src, dst)
+        return dst
 
     def back_light(self, value):
         """
@@ -410,11 +676,9 @@ class ST7789(framebuf.FrameBuffer):
         Args:
             value: 背光等级 0 ~ 255
         """
-        self.bl.freq(1000)
         if value >= 0xff:
             value = 0xff
-        data = value * 0xffff >> 8
-        self.bl.duty_u16(data)
+        self.bl.duty_u16(value * 257)  # 0 ~ 255 乘以 257 正好对应 0 ~ 65535
 
     def circle(self, x, y, radius, c, section=100):
         """
@@ -425,15 +689,37 @@ class ST7789(framebuf.FrameBuffer):
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
+            section: 分段（已不再使用，仅为兼容保留）
+        """
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = self.pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
+
+    def pixels(self, points):
+        """
+        批量绘制像素，由 viper 函数一次写入帧缓冲区，避免逐个调用 pixel
+
+        Args:
+            points: 像素数组，格式为 array('i', [x0, y0, c0, x1, y1, c1, ...])
         """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+        _plot(self.buffer, (self.width << 16) | self.height, points, len(points) // 3)
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -445,15 +731,15 @@ class ST7789(framebuf.FrameBuffer):
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
+        # 由 viper 函数直接写入帧缓冲区，避免逐行调用 hline
+        args = self._circle_args
+        args[0] = self.width
+        args[1] = self.height
+        args[2] = x
+        args[3] = y
+        args[4] = radius
+        args[5] = c
+        _fill_circle(self.buffer, args)
 
     # def image(self, file_name):
     #     with open(file_name, "rb") as bmp:
@@ -8,8 +8,8 @@
 # https://github.com/russhughes/st7789py_mpy/
 # https://github.com/AntonVanke/MicroPython-uFont
 # https://github.com/cheungbx/st7735-esp8266-micropython/blob/master/st7735.py
-import math
-from struct import pack
+import micropython
+from struct import pack_into
 from machine import Pin, PWM
 from micropython import const
 from time import sleep_us, sleep_ms
@@ -87,7 +87,23 @@ _ENCODE_PIXEL = ">H"
 _ENCODE_POS = ">HH"
 _DECODE_PIXEL = ">BBB"
 
-_BUFFER_SIZE = const(256)
+_BUFFER_SHIFT = const(9)  # fill_rect() 每块的像素数为 2 的幂，可用移位和掩码代替除法
+_BUFFER_SIZE = const(1 << _BUFFER_SHIFT)
+
+# 初始化命令表，每项格式为 [命令, 参数长度, 参数...]，启动时在同一次片选内依次发送
+_INIT_SEQ = (
+    bytes((FRMCTR1, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR2, 3, 0x01, 0x2C, 0x2D)),
+    bytes((FRMCTR3, 6, 0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D)),
+    bytes((INVCTR, 1, 0x07)),
+    bytes((PWCTR1, 3, 0xA2, 0x02, 0x84)),
+    bytes((PWCTR2, 1, 0xC5)),
+    bytes((PWCTR3, 2, 0x0A, 0x00)),
+    bytes((PWCTR4, 2, 0x8A, 0x2A)),
+    bytes((PWCTR5, 2, 0x8A, 0xEE)),
+    bytes((VMCTR1, 1, 0x0E)),
+    bytes((ST7789_COLMOD, 1, (COLOR_MODE_65K | COLOR_MODE_16BIT) & 0x77)),
+)
 
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
@@ -133,17 +149,43 @@ WIDTH_135 = [(135, 240, 52, 40),
 # 60 = 90 right rotation
 # C0 = 180 right rotation
 # A0 = 270 right rotation
-ROTATIONS = [0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80]  # 旋转方向
-
-
-def _encode_pos(x, y):
-    """Encode a postion into bytes."""
-    return pack(_ENCODE_POS, x, y)
-
-
-def _encode_pixel(c):
-    """Encode a pixel color into bytes."""
-    return pack(_ENCODE_PIXEL, c)
+ROTATIONS = (0x00, 0x60, 0xC0, 0xA0, 0x40, 0x20, 0x80)  # 旋转方向
+# 每种旋转方向对应的 MADCTL 参数，前半部分为 BGR，后半部分为 RGB
+_MADCTL = tuple(bytes([r | (0x00 if rgb else 0x08)]) for rgb in (False, True) for r in ROTATIONS)
+
+
+@micropython.viper
+def rgb888_to_rgb565(src: ptr8, dst):
+    """
+    将 RGB888 数据批量转换为大端 RGB565，写入 dst
+
+    Args:
+        src: RGB888 数据，每个像素依次为 R、G、B 三个字节
+        dst: 输出缓冲区，长度为像素数量的两倍
+    """
+    o = ptr8(dst)
+    n = int(len(dst)) >> 1
+    for i in range(n):
+        j = 3 * i
+        v = ((src[j] & 0xf8) << 8) | ((src[j + 1] & 0xfc) << 3) | (src[j + 2] >> 3)
+        o[2 * i] = v >> 8
+        o[2 * i + 1] = v & 0xff
+
+
+@micropython.viper
+def _pack_pos(buf: ptr8, start: int, end: int):
+    """
+    以大端格式将起止地址写入 buf[0:4]，代替 struct.pack_into
+
+    Args:
+        buf: 输出缓冲区
+        start: 起始地址
+        end: 结束地址
+    """
+    buf[0] = start >> 8
+    buf[1] = start & 0xff
+    buf[2] = end >> 8
+    buf[3] = end & 0xff
 
 
 class ST7789:
@@ -168,6 +210,17 @@ class ST7789:
         self.height = height
         self.x_start = 0
         self.y_start = 0
+        self._last_win = None  # 屏幕当前的窗口 (x0, y0, x1, y1)，未知时为 None
+        self._cmd_buf = bytearray(1)  # 命令缓冲区，避免每次写命令时分配内存
+        self._pos_buf = bytearray(4)  # CASET / RASET 参数缓冲区，避免每次设置窗口时分配内存
+        self._pix_buf = bytearray(2)  # pixel() 的颜色缓冲区
+        self._fill_buf = bytearray(_BUFFER_SIZE * 2)  # fill_rect() 使用的颜色数据，颜色改变时才重新填充
+        self._fill_mv = memoryview(self._fill_buf)
+        self._fill_color = None
+        # 设置窗口的命令和参数: [CASET][x0, x1][RASET][y0, y1][RAMWR]，预先切片以免每次分配内存
+        self._win_buf = bytearray((ST7789_CASET, 0, 0, 0, 0, ST7789_RASET, 0, 0, 0, 0, ST7789_RAMWR))
+        mv = memoryview(self._win_buf)
+        self._win_parts = (mv[0:1], mv[1:5], mv[5:6], mv[6:10], mv[10:11])
         self.spi = spi
         self.res = Pin(res, Pin.OUT, Pin.PULL_DOWN)
         self.dc = Pin(dc, Pin.OUT, Pin.PULL_DOWN)
@@ -175,8 +228,18 @@ class ST7789:
             self.cs = int
         else:
             self.cs = Pin(cs, Pin.OUT, Pin.PULL_DOWN)
+        # 缓存引脚的 on / off 绑定方法和 SPI 写入方法，减少每次 SPI 传输时的属性查找
+        self._dc0 = self.dc.off
+        self._dc1 = self.dc.on
+        if cs is None:
+            self._cs0 = self._cs1 = int
+        else:
+            self._cs0 = self.cs.off
+            self._cs1 = self.cs.on
+        self._spi_write = spi.write
         if bl is not None:
             self.bl = PWM(Pin(bl, Pin.OUT))
+            self.bl.freq(1000)
             self.back_light(255)
         else:
             self.bl = None
@@ -187,19 +250,7 @@ class ST7789:
         self.poweron()
         #
         sleep_us(300)
-        self._write(FRMCTR1, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR2, bytearray([0x01, 0x2C, 0x2D]))
-        self._write(FRMCTR3, bytearray([0x01, 0x2C, 0x2D, 0x01, 0x2C, 0x2D]))
-        sleep_us(10)
-        self._write(INVCTR, bytearray([0x07]))
-        self._write(PWCTR1, bytearray([0xA2, 0x02, 0x84]))
-        self._write(PWCTR2, bytearray([0xC5]))
-        self._write(PWCTR3, bytearray([0x0A, 0x00]))
-        self._write(PWCTR4, bytearray([0x8A, 0x2A]))
-        self._write(PWCTR5, bytearray([0x8A, 0xEE]))
-        self._write(VMCTR1, bytearray([0x0E]))
-        #
-        self._set_color_mode(COLOR_MODE_65K | COLOR_MODE_16BIT)
+        self._write_seq(_INIT_SEQ)
         sleep_ms(50)
         self.rotate(self._rotate)
         self.invert(invert)
@@ -212,14 +263,32 @@ class ST7789:
 
     def _write(self, command=None, data=None):
         """SPI write to the device: commands and data."""
-        self.cs(0)
+        self._cs0()
         if command is not None:
-            self.dc(0)
-            self.spi.write(bytes([command]))
+            self._dc0()
+            self._cmd_buf[0] = command
+            self._spi_write(self._cmd_buf)
         if data is not None:
-            self.dc(1)
-            self.spi.write(data)
-        self.cs(1)
+            self._dc1()
+            self._spi_write(data)
+        self._cs1()
+
+    def _write_seq(self, seq):
+        """
+        在同一次片选内依次发送一组命令及参数
+
+        Args:
+            seq: 命令表，每项格式为 [命令, 参数长度, 参数...]
+        """
+        write = self._spi_write
+        self._cs0()
+        for e in seq:
+            self._dc0()
+            write(e[0:1])
+            if e[1]:
+                self._dc1()
+                write(e[2:2 + e[1]])
+        self._cs1()
 
     def write_cmd(self, cmd):
         """
@@ -228,10 +297,11 @@ class ST7789:
         Args:
             cmd: 命令内容
         """
-        self.cs(0)
-        self.dc(0)
-        self.spi.write(bytes([cmd]))
-        self.cs(1)
+        self._cs0()
+        self._dc0()
+        self._cmd_buf[0] = cmd
+        self._spi_write(self._cmd_buf)
+        self._cs1()
 
     def write_data(self, data):
         """
@@ -240,29 +310,31 @@ class ST7789:
         Args:
             data: 数据内容
         """
-        self.cs(0)
-        self.dc(1)
-        self.spi.write(data)
-        self.cs(1)
+        self._cs0()
+        self._dc1()
+        self._spi_write(data)
+        self._cs1()
 
     def hard_reset(self):
         """
         Hard reset display.
         """
-        self.cs(0)
+        self._cs0()
         self.res(1)
         sleep_ms(50)
         self.res(0)
         sleep_ms(50)
         self.res(1)
         sleep_ms(150)
-        self.cs(1)
+        self._cs1()
+        self._last_win = None
 
     def soft_reset(self):
         """
         Soft reset display.
         """
         self._write(ST7789_SWRESET)
+        self._last_win = None
         sleep_ms(150)
 
     def poweron(self):
@@ -312,7 +384,6 @@ class ST7789:
                 - 6-Lower left printing right (backwards) (Y Flip)
         """
         self._rotate = rotate
-        madctl = ROTATIONS[rotate]
         if self.width == 320:
             table = WIDTH_320
         elif self.width == 240:
@@ -325,7 +396,8 @@ class ST7789:
             )
 
         self.width, self.height, self.x_start, self.y_start = table[rotate]
-        self._write(ST7789_MADCTL, bytes([madctl | (0x00 if self._rgb else 0x08)]))
+        self._last_win = None
+        self._write(ST7789_MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + rotate])
 
     def _set_columns(self, start, end):
         """
@@ -336,8 +408,9 @@ class ST7789:
             end (int): column end address
         """
         if start <= end <= self.width:
-            self._write(ST7789_CASET, _encode_pos(
-                start + self.x_start, end + self.x_start))
+            _pack_pos(self._pos_buf, start + self.x_start, end + self.x_start)
+            self._write(ST7789_CASET, self._pos_buf)
+            self._last_win = None
 
     def _set_rows(self, start, end):
         """
@@ -348,8 +421,9 @@ class ST7789:
             end (int): row end address
        """
         if start <= end <= self.height:
-            self._write(ST7789_RASET, _encode_pos(
-                start + self.y_start, end + self.y_start))
+            _pack_pos(self._pos_buf, start + self.y_start, end + self.y_start)
+            self._write(ST7789_RASET, self._pos_buf)
+            self._last_win = None
 
     def set_window(self, x0, y0, x1, y1):
         """
@@ -362,9 +436,28 @@ class ST7789:
             y1 (int): row end address
         """
         if x0 < self.width and y0 < self.height:
-            self._set_columns(x0, x1)
-            self._set_rows(y0, y1)
-            self._write(ST7789_RAMWR)
+            # CASET、RASET 和 RAMWR 在同一次片选内发送，只通过 DC 区分命令和参数
+            caset, cols, raset, rows, ramwr = self._win_parts
+            write = self._spi_write
+            win = (x0, y0, x1, y1)
+            self._cs0()
+            if win != self._last_win:  # 窗口未改变时只需发送 RAMWR，写入位置会回到窗口起点
+                self._last_win = win
+                if x0 <= x1 <= self.width:
+                    _pack_pos(cols, x0 + self.x_start, x1 + self.x_start)
+                    self._dc0()
+                    write(caset)
+                    self._dc1()
+                    write(cols)
+                if y0 <= y1 <= self.height:
+                    _pack_pos(rows, y0 + self.y_start, y1 + self.y_start)
+                    self._dc0()
+                    write(raset)
+                    self._dc1()
+                    write(rows)
+            self._dc0()
+            write(ramwr)
+            self._cs1()
 
     def clear(self):
         """
@@ -386,14 +479,31 @@ class ST7789:
             enable: RGB else BGR
         """
         self._rgb = enable
-        self._write(ST7789_MADCTL, bytes([ROTATIONS[self._rotate] | (0x00 if self._rgb else 0x08)]))
+        self._write(ST7789_MADCTL, _MADCTL[(len(ROTATIONS) if self._rgb else 0) + self._rotate])
 
     @staticmethod
-    def color(r, g, b):
+    @micropython.viper
+    def color(r: int, g: int, b: int) -> int:
         """
         Convert red, green and blue values (0-255) into a 16-bit 565 encoding.
         """
-        return (r & 0xf8) << 8 | (g & 0xfc) << 3 | b >> 3
+        # viper 将纯整数运算编译为机器码，批量转换颜色时明显更快
+        return ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+
+    @staticmethod
+    def color_buf(src):
+        """
+        将 RGB888 数据批量转换为 RGB565 数据，可直接用于 blit_buffer
+
+        Args:
+            src: RGB888 数据，每个像素依次为 R、G、B 三个字节
+
+        Returns:
+            RGB565 数据
+        """
+        dst = bytearray(len(src) // 3 * 2)
+        rgb888_to_rgb565(src, dst)
+        return dst
 
     def back_light(self, value):
         """
@@ -402,11 +512,9 @@ class ST7789:
         Args:
             value: 背光等级 0 ~ 255
         """
-        self.bl.freq(1000)
         if value >= 0xff:
             value = 0xff
-        data = value * 0xffff >> 8
-        self.bl.duty_u16(data)
+        self.bl.duty_u16(value * 257)  # 0 ~ 255 乘以 257 正好对应 0 ~ 65535
 
     def vline(self, x, y, h, c):
         """
@@ -442,21 +550,34 @@ class ST7789:
             c (int): 565 encoded color
         """
         self.set_window(x, y, x, y)
-        self._write(None, _encode_pixel(c))
+        pack_into(_ENCODE_PIXEL, self._pix_buf, 0, c)
+        self._write(None, self._pix_buf)
 
-    def blit_buffer(self, buffer, x, y, width, height):
+    def blit_buffer(self, buffer, x, y, width, height, stride=None):
         """
         Copy buffer to display at the given location.
 
         Args:
-            buffer (bytes): Data to copy to display
+            buffer (bytes): Data to copy to display, any object supporting the buffer protocol
             x (int): Top left corner x coordinate
             y (int): Top left corner y coordinate
             width (int): Width
             height (int): Height
+            stride (int): Bytes per row in buffer, for blitting a region cropped from a wider image
         """
+        mv = memoryview(buffer)  # 切片时不会复制数据
         self.set_window(x, y, x + width - 1, y + height - 1)
-        self._write(None, buffer)
+        write = self._spi_write
+        self._cs0()
+        self._dc1()
+        row = width * 2
+        if stride is None or stride == row:
+            write(mv)
+        else:
+            # 逐行发送裁剪区域，不需要临时缓冲区
+            for i in range(0, stride * height, stride):
+                write(mv[i:i + row])
+        self._cs1()
 
     def rect(self, x, y, w, h, c):
         """
@@ -486,15 +607,28 @@ class ST7789:
             c (int): 565 encoded color
         """
         self.set_window(x, y, x + w - 1, y + h - 1)
-        chunks, rest = divmod(w * h, _BUFFER_SIZE)
-        pixel = _encode_pixel(c)
-        self.dc(1)
-        if chunks:
-            data = pixel * _BUFFER_SIZE
-            for _ in range(chunks):
-                self._write(None, data)
+        count = w * h
+        chunks = count >> _BUFFER_SHIFT
+        rest = count & (_BUFFER_SIZE - 1)
+        data = self._fill_buf
+        mv = self._fill_mv
+        if c != self._fill_color:
+            # 写入第一个像素后成倍复制，只需 log2(_BUFFER_SIZE) 次复制即可填满
+            pack_into(_ENCODE_PIXEL, data, 0, c)
+            n = 2
+            while n < len(data):
+                mv[n:n * 2] = mv[0:n]
+                n *= 2
+            self._fill_color = c
+        write = self._spi_write
+        # 所有像素数据在同一次片选内连续发送，不足一块的部分直接发送缓冲区切片，不再分配内存
+        self._cs0()
+        self._dc1()
+        for _ in range(chunks):
+            write(data)
         if rest:
-            self._write(None, pixel * rest)
+            write(mv[0:rest * 2])
+        self._cs1()
 
     def fill(self, c):
         """
@@ -527,15 +661,20 @@ class ST7789:
         dy = abs(y2 - y1)
         err = dx // 2
         ystep = 1 if y1 < y2 else -1
+        # 副坐标不变的连续像素合并为一条水平线或垂直线，每段只需设置一次窗口
+        run = self.vline if steep else self.hline
+        start = x1
         while x1 <= x2:
-            if steep:
-                self.pixel(y1, x1, c)
-            else:
-                self.pixel(x1, y1, c)
             err -= dy
-            if err < 0:
-                y1 += ystep
-                err += dx
+            if err < 0 or x1 == x2:
+                if steep:
+                    run(y1, start, x1 - start + 1, c)
+                else:
+                    run(start, y1, x1 - start + 1, c)
+                start = x1 + 1
+                if err < 0:
+                    y1 += ystep
+                    err += dx
             x1 += 1
 
     def circle(self, x, y, radius, c, section=100):
@@ -547,15 +686,28 @@ class ST7789:
             x: 中心 x 坐标
             y: 中心 y 坐标
             radius: 半径
-            section: 分段
-        """
-        arr = []
-        for m in range(section + 1):
-            _x = round(radius * math.cos((2 * math.pi / section) * m - math.pi) + x)
-            _y = round(radius * math.sin((2 * math.pi / section) * m - math.pi) + y)
-            arr.append([_x, _y])
-        for i in range(len(arr) - 1):
-            self.line(*arr[i], *arr[i + 1], c)
+            section: 分段（已不再使用，仅为兼容保留）
+        """
+        # 中点画圆法，只使用整数运算，每次计算八个对称点
+        pixel = self.pixel
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            pixel(x + _x, y + _y, c)
+            pixel(x - _x, y + _y, c)
+            pixel(x + _x, y - _y, c)
+            pixel(x - _x, y - _y, c)
+            pixel(x + _y, y + _x, c)
+            pixel(x - _y, y + _x, c)
+            pixel(x + _y, y - _x, c)
+            pixel(x - _y, y - _x, c)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
 
     def fill_circle(self, x, y, radius, c):
         """
@@ -567,15 +719,37 @@ class ST7789:
             y: 中心 y 坐标
             radius: 半径
         """
-        rsq = radius * radius
-        for _x in range(radius):
-            _y = int(math.sqrt(rsq - _x * _x))  # 计算 y 坐标
-            y0 = y - _y
-            end_y = y0 + _y * 2
-            y0 = max(0, min(y0, self.height))  # 将 y0 限制在画布的范围内
-            length = abs(end_y - y0) + 1
-            self.vline(x + _x, y0, length, c)  # 绘制左右两侧的垂直线
-            self.vline(x - _x, y0, length, c)
+        # 中点画圆法逐行绘制水平线，只使用整数运算
+        hline = self.hline
+        width = self.width
+        height = self.height
+
+        def span(x0, y0, x1):
+            # 直接驱动时窗口不会自动裁剪，超出屏幕的部分需要先裁掉，完全在屏幕外的行直接跳过
+            if 0 <= y0 < height:
+                if x0 < 0:
+                    x0 = 0
+                if x1 >= width:
+                    x1 = width - 1
+                if x0 <= x1:
+                    hline(x0, y0, x1 - x0 + 1, c)
+
+        _x = radius
+        _y = 0
+        err = 1 - radius
+        while _x >= _y:
+            span(x - _x, y + _y, x + _x)
+            if _y:
+                span(x - _x, y - _y, x + _x)
+            if err >= 0:  # _x 即将减小，此时 _y 为第 _x 行的最大半宽
+                span(x - _y, y + _x, x + _y)
+                span(x - _y, y - _x, x + _y)
+            _y += 1
+            if err < 0:
+                err += 2 * _y + 1
+            else:
+                _x -= 1
+                err += 2 * (_y - _x) + 1
 
     # def image(self, file_name):
     #     with open(file_name, "rb") as bmp:
@@ -54,7 +54,7 @@ def get_im(word, width, height, font, offset: tuple = (0, 0)) -> Image.Image:
     return im
 
 
-def to_bitmap(word: str, font_size: int, font, offset=(0, 0)) -> bytearray:
+def to_bitmap(word: str, font_size: int, font, offset=(0, 0), scratch=None) -> bytearray:
     """ 获取点阵字节数据
 
     Args:
@@ -62,6 +62,7 @@ def to_bitmap(word: str, font_size: int, font, offset=(0, 0)) -> bytearray:
         font_size: 字号
         font: 字体
         offset: 偏移
+        scratch: 可复用的 uint8 暂存数组，形状为 (字号, 补齐到 8 的倍数的宽度)，为 None 时自动创建
 
     Returns:
         字节数据
@@ -76,20 +77,13 @@ def to_bitmap(word: str, font_size: int, font, offset=(0, 0)) -> bytearray:
     except IndexError:
         print(word, word.encode("utf-8"))
 
-    # 获取点阵图
-    bp = np.pad(
-        (~np.asarray(get_im(word, width=font_size, height=font_size, font=font, offset=offset))).astype(np.int32),
-        ((0, 0), (0, int(np.ceil(font_size / 8) * 8 - font_size))), 'constant',
-        constant_values=(0, 0))
+    # 获取点阵图，写入暂存数组的左侧，右侧补齐的列始终为 0，无需每个字重新分配并填充
+    if scratch is None:
+        scratch = np.zeros((font_size, int(np.ceil(font_size / 8)) * 8), dtype=np.uint8)
+    scratch[:, :font_size] = ~np.asarray(get_im(word, width=font_size, height=font_size, font=font, offset=offset))
 
-    # 点阵映射 MONO_HLSB
-    bmf = []
-    for line in bp.reshape((-1, 8)):
-        v = 0x00
-        for _ in line:
-            v = (v << 1) + _
-        bmf.append(v)
-    return bytearray(bmf)
+    # 点阵映射 MONO_HLSB，每行按高位在前打包为字节（宽度已补齐为 8 的倍数）
+    return bytearray(np.packbits(scratch, axis=1).tobytes())
 
 
 def get_unicode(word) -> bytes:
@@ -135,14 +129,14 @@ def run(font_file, font_size=16, offset=(0, 0), text_file=None, text=None, bitma
         0, 0, 0, 0, 0, 0, 0  # 兼容项
     ]))
 
-    for w in words:
-        bitmap_fonts.write(get_unicode(w))
+    # 编码表和位图先在内存中拼接，再一次写入文件，减少小块写入的次数
+    bitmap_fonts.write(b"".join([get_unicode(w) for w in words]))
 
     # 位图开始字节
     start_bitmap = bitmap_fonts.tell()
     print("\t位图起始字节：", hex(start_bitmap))
-    for w in words:
-        bitmap_fonts.write(to_bitmap(w, font_size, font, offset=offset))
+    scratch = np.zeros((font_size, int(np.ceil(font_size / 8)) * 8), dtype=np.uint8)  # 所有字共用的暂存数组
+    bitmap_fonts.write(b"".join([to_bitmap(w, font_size, font, offset=offset, scratch=scratch) for w in words]))
     file_size = bitmap_fonts.tell()
     print(f"\t文件大小：{file_size / 1024:.4f}KByte")
     bitmap_fonts.seek(4, 0)
@@ -28,14 +28,15 @@ def set_text_file():
     Returns:
 
     """
-    global text_file, text
+    global text_file, text, text_count
     text_file = askopenfilename(title='选择字符集文件',
                                 filetypes=[('文本文件', '*.txt'), ('All Files', '*')], initialdir="./")
     text_file_buf = open(text_file, "r", encoding="utf-8")
     text = text_file_buf.read()
     text_input.delete("1.0", tk.END)
     text_input.insert(tk.END, text)
-    text_len.set(f'字符数量: {len(set(text))}')
+    text_count = len(set(text))
+    text_len.set(f'字符数量: {text_count}')
     text_file_show.set(text_file)
     get_image()
 
@@ -61,9 +62,27 @@ def save_file():
 
 
 def text_input_update(_):
-    global text
+    global text, text_count
     text = text_input.get("1.0", tk.END)[:-1]
-    text_len.set(f'字符数量: {len(set(text))}')
+    text_count = len(set(text))  # 只在文本改变时统计一次，预览时直接使用
+    text_len.set(f'字符数量: {text_count}')
+
+
+def get_font(size):
+    """获取字体，同一字体文件和字号只加载一次
+
+    Args:
+        size: 字号
+
+    Returns:
+        PIL.ImageFont.FreeTypeFont
+    """
+    key = (font_file, size)
+    font = font_cache.get(key)
+    if font is None:
+        font = ImageFont.truetype(font=font_file, size=size)
+        font_cache[key] = font
+    return font
 
 
 def get_image(*args):
@@ -74,9 +93,9 @@ def get_image(*args):
     draw = ImageDraw.Draw(im)
     if len(preview_text.get()) >= 1:
         estimated_size.set(
-            f"预计大小:{(16 + len(set(text)) * font_size.get() ** 2 // 8 + len(set(text)) * 2) / 1024:.2f}KBytes")
+            f"预计大小:{(16 + text_count * font_size.get() ** 2 // 8 + text_count * 2) / 1024:.2f}KBytes")
         draw.text((offset_x.get(), offset_y.get()), preview_text.get()[0],
-                  font=ImageFont.truetype(font=font_file, size=font_size.get()))
+                  font=get_font(font_size.get()))
         img = ImageTk.BitmapImage(im)
         img_label = tk.Label(font_preview, bd=1, relief="sunken", image=img)
         img_label.place(x=95, y=100, width=50, height=50, anchor="center")
@@ -93,6 +112,8 @@ root.maxsize(620, 620)
 font_file = ""
 text_file = ""
 text = ""
+text_count = 0  # 字符集中不重复的字符数量
+font_cache = {}  # 已加载的字体 {(字体文件, 字号): 字体}
 
 estimated_size = tk.StringVar()
 font_size = tk.IntVar()
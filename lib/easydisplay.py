@@ -13,13 +13,123 @@
 # PBM文件转换：https://blog.csdn.net/jd3096/article/details/121319042
 # 灰度化、二值化：https://blog.csdn.net/li_wen01/article/details/72867057
 # Framebuffer 的 Palette: https://forum.micropython.org/viewtopic.php?t=12857
+import micropython
+from micropython import const
 from io import BytesIO
+from array import array
 from struct import unpack
 from framebuf import FrameBuffer, MONO_HLSB, RGB565
 
+_scale_maps = {}  # 字符缩放的坐标映射表缓存 {(新字号, 旧字号): 映射表}
+_ROW_INVERT = const(1)  # _rgb888_to_rgb565(): 反转颜色
+_ROW_BGR = const(2)  # _rgb888_to_rgb565(): 源数据为 BGR 顺序
+
+
+def _find_code(index, code: int) -> int:
+    """
+    在按升序排列的大端序 2 字节编码表中二分查找编码
+
+    Args:
+        index: 编码表
+        code: 要查找的编码
+
+    Returns:
+        编码在表中的序号，不存在时返回 -1
+    """
+    start = 0
+    end = len(index) >> 1  # 编码表中的编码数量，每个编码占 2 字节
+    while start < end:
+        mid = (start + end) >> 1
+        target_code = index[mid << 1] << 8 | index[(mid << 1) + 1]
+        if code == target_code:
+            return mid
+        elif code < target_code:
+            end = mid
+        else:
+            start = mid + 1
+    return -1
+
+
+@micropython.viper
+def _hlsb_scale(src: ptr8, dst: ptr8, maps: ptr16, size: int):
+    """
+    按坐标映射表缩放 MONO_HLSB 字符点阵，dst 需预先清零
+
+    Args:
+        src: 源字符数据
+        dst: 缩放后的字符数据，每行 (size + 7) // 8 字节
+        maps: 映射表，前 size 项为每行在源数据中的起始位，后 size 项为每列在源数据中的列号
+        size: 新字符大小
+    """
+    stride = (size + 7) >> 3
+    i = 0
+    for y in range(size):
+        base = int(maps[y])
+        for x in range(size):
+            bit = base + int(maps[size + x])
+            if (src[bit >> 3] >> (7 - (bit & 7))) & 1:
+                j = i + (x >> 3)
+                dst[j] = dst[j] | (0x80 >> (x & 7))
+        i += stride
+
+
+@micropython.viper
+def _rgb888_to_rgb565(src: ptr8, dst: ptr8, n: int, flags: int):
+    """
+    将一行 RGB888 像素转换为大端序的 RGB565 像素
+
+    Args:
+        src: 源数据，每个像素 3 字节
+        dst: 目标数据，每个像素 2 字节
+        n: 像素数量
+        flags: _ROW_INVERT 反转颜色，_ROW_BGR 源数据为 BGR 顺序（BMP）
+    """
+    inv = 0
+    if flags & _ROW_INVERT:
+        inv = 0xff
+    ri = 0
+    if flags & _ROW_BGR:
+        ri = 2
+    bi = 2 - ri
+    s = 0
+    d = 0
+    for _ in range(n):
+        r = src[s + ri] ^ inv
+        g = src[s + 1] ^ inv
+        b = src[s + bi] ^ inv
+        dst[d] = (r & 0xf8) | (g >> 5)
+        dst[d + 1] = ((g << 3) & 0xe0) | (b >> 3)
+        s += 3
+        d += 2
+
+
+@micropython.viper
+def _rgb888_to_mono(src: ptr8, dst: ptr8, n: int, flags: int):
+    """
+    将一行 RGB888 像素按亮度阈值转换为 MONO_HLSB 位图，平均亮度 >= 127 的像素为 1
+
+    Args:
+        src: 源数据，每个像素 3 字节，分量顺序不影响结果
+        dst: 目标数据，每个像素 1 位
+        n: 像素数量
+        flags: _ROW_INVERT 反转颜色
+    """
+    for j in range((n + 7) >> 3):
+        dst[j] = 0
+    inv = flags & _ROW_INVERT
+    s = 0
+    for i in range(n):
+        total = src[s] + src[s + 1] + src[s + 2]
+        if inv:
+            total = 765 - total
+        if total >= 381:  # 平均亮度 >= 127 等价于三个分量之和 >= 381
+            dst[i >> 3] = dst[i >> 3] | (0x80 >> (i & 7))
+        s += 3
+
 
 class EasyDisplay:
     READ_SIZE = 32  # Limit the picture read size to prevent memory errors in low-performance development boards
+    GLYPH_CACHE_SIZE = 64  # 缓存的字符点阵数量，为 0 时不缓存
 
     def __init__(self, display,
                  color_type,
@@ -89,6 +199,16 @@ class EasyDisplay:
         self.font_map_mode = None
         self.font_start_bitmap = None
         self.font_bitmap_size = None
+        self._font_index = None
+        self._glyph_cache = {}  # 已缩放的字符点阵缓存 {(字符编码, 字号): 点阵数据}
+        self._glyph_lru = []  # 缓存键的使用顺序，最久未使用的在最前面
+        self._render_fbufs = {}  # 直接驱动模式下渲染彩色字符用的 FrameBuffer {字号: FrameBuffer}
+        self._glyph_file = None  # precache() 生成的预渲染字符文件
+        self._glyph_file_size = None
+        self._glyph_file_index = None
+        self._glyph_file_start = None
+        self._glyph_file_buf = None
+        self._glyph_file_fbuf = None
         if font:
             self.load_font(font)
 
@@ -162,22 +282,7 @@ class EasyDisplay:
         Args:
             word: Character 字符
         """
-        word_code = ord(word)
-        start = 0x10
-        end = self.font_start_bitmap
-        _seek = self._font.seek
-        _font_read = self._font.read
-        while start <= end:
-            mid = ((start + end) // 4) * 2
-            _seek(mid, 0)
-            target_code = unpack(">H", _font_read(2))[0]
-            if word_code == target_code:
-                return (mid - 16) >> 1
-            elif word_code < target_code:
-                end = mid - 2
-            else:
-                start = mid + 2
-        return -1
+        return _find_code(self._font_index, ord(word))
 
     # @timeit
     @staticmethod
@@ -193,18 +298,16 @@ class EasyDisplay:
         Returns:
             Scaled character data 缩放后的数据
         """
-        r = range(new_size)  # Preload functions to avoid repeated execution and improve efficiency
         if old_size == new_size:
             return bytearray_data
-        _t = bytearray(new_size * ((new_size >> 3) + 1))
-        _new_index = -1
-        for _col in r:
-            for _row in r:
-                if _row % 8 == 0:
-                    _new_index += 1
-                _old_index = int(_col / (new_size / old_size)) * old_size + int(_row / (new_size / old_size))
-                _t[_new_index] = _t[_new_index] | (
-                        (bytearray_data[_old_index >> 3] >> (7 - _old_index % 8) & 1) << (7 - _row % 8))
+        maps = _scale_maps.get((new_size, old_size))
+        if maps is None:  # 每种缩放比例只计算一次坐标映射表，只使用整数运算
+            r = range(new_size)
+            maps = array('H', [(i * old_size // new_size) * old_size for i in r] +
+                         [i * old_size // new_size for i in r])
+            _scale_maps[(new_size, old_size)] = maps
+        _t = bytearray(new_size * ((new_size + 7) >> 3))
+        _hlsb_scale(bytearray_data, _t, maps, new_size)
         return _t
 
     def get_bitmap(self, word: str) -> bytes:
@@ -224,6 +327,36 @@ class EasyDisplay:
         self._font.seek(self.font_start_bitmap + index * self.font_bitmap_size, 0)
         return self._font.read(self.font_bitmap_size)
 
+    def _get_glyph(self, word: str, size: int) -> bytearray:
+        """
+        Get Scaled Dot Matrix Image 获取缩放后的点阵图（带缓存）
+
+        Args:
+            word: Single character 单个字符
+            size: Font size 字号
+
+        Returns:
+            Scaled character data 缩放后的字符点阵
+        """
+        key = (ord(word), size)
+        cache = self._glyph_cache
+        lru = self._glyph_lru
+        data = cache.get(key)
+        if data is not None:
+            if lru[-1] != key:  # 移到末尾，表示最近使用过
+                lru.remove(key)
+                lru.append(key)
+            return data
+        data = bytearray(self.get_bitmap(word))
+        if size != self.font_size:
+            data = self._hlsb_font_size(data, size, self.font_size)
+        if self.GLYPH_CACHE_SIZE > 0:
+            if len(lru) >= self.GLYPH_CACHE_SIZE:  # 淘汰最久未使用的字符
+                del cache[lru.pop(0)]
+            cache[key] = data
+            lru.append(key)
+        return data
+
     def load_font(self, file: str):
         """
         Load Font File 加载字体文件
@@ -233,6 +366,8 @@ class EasyDisplay:
         """
         self.font_file = file
         self._font = open(file, "rb")
+        self._glyph_cache.clear()  # 更换字体后缓存的点阵失效
+        self._glyph_lru.clear()
         # 获取字体文件信息
         #  字体文件信息大小 16 byte ,按照顺序依次是
         #   文件标识 2 byte
@@ -259,6 +394,9 @@ class EasyDisplay:
             self.size = int(self.font_size)
         # 点阵所占字节，用来定位字体数据位置
         self.font_bitmap_size = self.font_bmf_info[8]
+        # 编码表一次性读入内存，查找文字时直接在内存中二分查找，避免每次查找都反复读取文件
+        self._font.seek(16, 0)
+        self._font_index = self._font.read(self.font_start_bitmap - 16)
 
     def text(self, s: str, x: int, y: int,
              color: int = None, bg_color: int = None, size: int = None,
@@ -346,58 +484,212 @@ class EasyDisplay:
         if clear:
             self.clear()
 
+        # 显示方式在循环外确定一次，循环内不再重复比较颜色类型和查找属性
+        if self._buffer:
+            mode = 0  # FrameBuffer Driven
+            dp_blit = dp.blit
+        else:
+            mode = 1 if color_type == "RGB565" else 2  # 直接驱动：渲染为彩色后发送 / 直接发送黑白点阵
+            set_window = dp.set_window
+            write_data = dp.write_data
+        if mode == 1:
+            # 同一字号复用同一个彩色渲染缓冲区，避免每个字符都分配内存
+            n_fbuf = self._render_fbufs.get(font_size)
+            if n_fbuf is None:
+                n_fbuf = FrameBuffer(bytearray(font_size * font_size * 2), font_size, font_size, RGB565)
+                self._render_fbufs[font_size] = n_fbuf
+            # 透明色与前景或背景色相同时，部分像素不会被写入，需要先清除上一个字符
+            render_clear = key == color or key == bg_color
+        get_glyph = self._get_glyph
+        dp_width = dp.width
+        dp_height = dp.height
+        line_height = font_size + line_spacing
+
         for char in s:
-            if auto_wrap and ((x + font_offset > dp.width and ord(char) < 128 and half_char) or
-                              (x + font_size > dp.width and (not half_char or ord(char) > 128))):
-                y += font_size + line_spacing
+            code = ord(char)
+            half = half_char and code < 128  # 英文字符半格显示
+            if auto_wrap and ((x + font_offset > dp_width and half) or
+                              (x + font_size > dp_width and (not half_char or code > 128))):
+                y += line_height
                 x = init_x
 
             # 对控制字符的处理
-            if char == '\n':
-                y += font_size + line_spacing
-                x = init_x
-                continue
-            elif char == '\t':
-                x = ((x // font_size) + 1) * font_size + init_x % font_size
-                continue
-            elif ord(char) < 16:
+            if code < 16:
+                if char == '\n':
+                    y += line_height
+                    x = init_x
+                elif char == '\t':
+                    x = ((x // font_size) + 1) * font_size + init_x % font_size
                 continue
 
             # 超过范围的字符不会显示
-            if x > dp.width or y > dp.height:
+            if x > dp_width or y > dp_height:
                 continue
 
-            # 获取字体的点阵数据
-            byte_data = self.get_bitmap(char)
-
-            # 准备并缩放字符数据
-            byte_data = bytearray(byte_data)
-            if font_size != self.font_size:
-                byte_data = self._hlsb_font_size(byte_data, font_size, self.font_size)
+            # 获取缩放后的字体点阵数据，重复出现的字符直接使用缓存
+            fbuf = FrameBuffer(get_glyph(char, font_size), font_size, font_size, MONO_HLSB)
 
             # 显示字符
-            fbuf = FrameBuffer(byte_data, font_size, font_size, MONO_HLSB)
-            if self._buffer:  # FrameBuffer Driven
-                dp.blit(fbuf, x, y, key, palette)
+            if mode == 0:
+                dp_blit(fbuf, x, y, key, palette)
+            elif mode == 1:
+                if render_clear:
+                    n_fbuf.fill(0)
+                n_fbuf.blit(fbuf, 0, 0, key, palette)  # Render black and white pixels to color
+                set_window(x, y, x + font_size - 1, y + font_size - 1)
+                write_data(n_fbuf)
             else:
-                if color_type == "RGB565":
-                    n_fbuf = FrameBuffer(bytearray(font_size * font_size * 2), font_size, font_size, RGB565)
-                    n_fbuf.blit(fbuf, 0, 0, key, palette)  # Render black and white pixels to color
-                elif color_type == "MONO":
-                    n_fbuf = fbuf  # Not tested
-                else:
-                    raise ValueError("Unsupported color_type: {}".format(color_type))
-                dp.set_window(x, y, x + font_size - 1, y + font_size - 1)
-                dp.write_data(n_fbuf)
+                set_window(x, y, x + font_size - 1, y + font_size - 1)
+                write_data(fbuf)  # Not tested
 
-            # 英文字符半格显示
-            if ord(char) < 128 and half_char:
-                x += font_offset
-            else:
-                x += font_size
+            x += font_offset if half else font_size
 
         self.show() if show else 0
 
+    def precache(self, chars: str, file: str, size: int = None, color: int = None, bg_color: int = None,
+                 invert: bool = None):
+        """
+        Pre-render characters to a file for text_fast(), only supports RGB565 format.
+        将字符预先渲染为 RGB565 数据并保存到文件，供 text_fast() 直接发送到屏幕，仅支持 RGB565 格式
+
+        Args:
+            chars: Characters to pre-render
+                需要预渲染的字符
+            file: Path of the pre-rendered glyph file
+                预渲染字符文件的路径
+            size: Text size
+                文字大小
+            color: Text color
+                文字颜色
+            bg_color: Text background color
+                文字背景颜色
+            invert: Invert colors
+                反转颜色
+        """
+        if color is None:
+            color = self.color
+        if bg_color is None:
+            bg_color = self.bg_color
+        if invert is None:
+            invert = self.invert
+        if invert:
+            color, bg_color = bg_color, color
+        font_size = size or self.size or self.font_size
+        palette = FrameBuffer(bytearray(4), 2, 1, RGB565)
+        palette.pixel(1, 0, color)
+        palette.pixel(0, 0, bg_color)
+        n_buf = bytearray(font_size * font_size * 2)
+        n_fbuf = FrameBuffer(n_buf, font_size, font_size, RGB565)
+        # 文件格式：文件头、版本、"字号 字数"，随后是升序排列的 2 字节编码表，最后是每个字的 RGB565 数据
+        codes = sorted(set(ord(char) for char in chars if 16 <= ord(char) <= 0xFFFF))
+        with open(file, "wb") as f:
+            f.write(b'EasyDisplayGlyph\nV1\n')
+            f.write('{} {}\n'.format(font_size, len(codes)).encode())
+            f.write(bytes(b for code in codes for b in (code >> 8, code & 0xFF)))
+            for code in codes:
+                fbuf = FrameBuffer(self._get_glyph(chr(code), font_size), font_size, font_size, MONO_HLSB)
+                n_fbuf.blit(fbuf, 0, 0, -1, palette)  # Render black and white pixels to color
+                f.write(n_buf)
+        self.load_glyph_file(file)
+
+    def load_glyph_file(self, file: str):
+        """
+        Load Pre-rendered Glyph File 加载 precache() 生成的预渲染字符文件
+
+        Args:
+            file: Path to the file 文件路径
+        """
+        if self._glyph_file:
+            self._glyph_file.close()
+        self._glyph_file = None
+        f = open(file, "rb")
+        if f.readline() != b'EasyDisplayGlyph\n' or f.readline() != b'V1\n':
+            f.close()
+            raise TypeError("Incorrect glyph file format: {}".format(file))
+        _size, _count = f.readline().split(b' ')
+        self._glyph_file_size = int(_size)
+        self._glyph_file_index = f.read(int(_count) * 2)
+        self._glyph_file_start = f.tell()
+        # 读取单个字符数据的缓冲区，加载时分配一次，显示时不再分配内存
+        self._glyph_file_buf = bytearray(self._glyph_file_size * self._glyph_file_size * 2)
+        self._glyph_file_fbuf = FrameBuffer(self._glyph_file_buf, self._glyph_file_size, self._glyph_file_size, RGB565)
+        self._glyph_file = f
+
+    def text_fast(self, s: str, x: int, y: int, key: int = None, show: bool = None, half_char: bool = None,
+                  line_spacing: int = None):
+        """
+        Display pre-rendered text, characters not in the glyph file are skipped.
+        显示预渲染的文本，预渲染字符文件中不存在的字符会被跳过
+
+        Args:
+            s: String
+                字符串
+            x: X-coordinate of the string
+                x 坐标
+            y: Y-coordinate of the string
+                y 坐标
+            key: Transparent color (only applicable in Framebuffer mode)
+                透明色 (仅适用于 Framebuffer 模式)
+            show: Show immediately
+                立即显示
+            half_char: Display ASCII characters in half width
+                半宽显示 ASCII 字符
+            line_spacing: Line spacing
+                行间距
+        """
+        if key is None:
+            key = self._key
+        if show is None:
+            show = self._show
+        if half_char is None:
+            half_char = self.half_char
+        if line_spacing is None:
+            line_spacing = self.line_spacing
+        f = self._glyph_file
+        if f is None:
+            raise AttributeError("The glyph file is not loaded... Did you forgot?")
+        font_size = self._glyph_file_size
+        font_offset = font_size // 2
+        glyph_bytes = font_size * font_size * 2
+        index = self._glyph_file_index
+        start = self._glyph_file_start
+        dp = self.display
+        buf = self._glyph_file_buf
+        f_seek = f.seek
+        f_rinto = f.readinto
+        self_buf = self._buffer
+        if self_buf:
+            fbuf = self._glyph_file_fbuf
+            dp_blit = dp.blit
+        else:
+            set_window = dp.set_window
+            write_data = dp.write_data
+        dp_width = dp.width
+        dp_height = dp.height
+        init_x = x
+        for char in s:
+            code = ord(char)
+            # 对控制字符的处理，与 text() 相同
+            if code < 16:
+                if char == '\n':
+                    y += font_size + line_spacing
+                    x = init_x
+                elif char == '\t':
+                    x = ((x // font_size) + 1) * font_size + init_x % font_size
+                continue
+            i = _find_code(index, code)
+            if i != -1 and x <= dp_width and y <= dp_height:  # 超过范围的字符不会显示
+                # 直接读取预渲染的数据发送到屏幕，无需查找、缩放和渲染
+                f_seek(start + i * glyph_bytes)
+                f_rinto(buf)
+                if self_buf:
+                    dp_blit(fbuf, x, y, key)
+                else:
+                    set_window(x, y, x + font_size - 1, y + font_size - 1)
+                    write_data(buf)
+            x += font_offset if half_char and code < 128 else font_size
+        self.show() if show else 0
+
     def ppm(self, *args, **kwargs):
         self.pbm(*args, **kwargs)
 
@@ -464,7 +756,7 @@ class EasyDisplay:
         with func as f:
             file_format = f.readline()  # 获取文件格式
             _width, _height = [int(value) for value in f.readline().split()]  # 获取图片的宽度和高度
-            f_read = f.read
+            f_rinto = f.readinto
             if file_format == b"P4\n":  # P4 位图 二进制
                 # 颜色反转
                 if invert:
@@ -480,7 +772,8 @@ class EasyDisplay:
                 palette.pixel(0, 0, bg_color)
 
                 if self._buffer:  # Framebuffer 模式
-                    data = bytearray(f_read())  # 读取并显示图像
+                    data = bytearray(((_width + 7) >> 3) * _height)  # 预先分配图像大小的内存，直接读入，不产生中间副本
+                    f_rinto(data)
                     fbuf = FrameBuffer(data, _width, _height, MONO_HLSB)
                     dp.blit(fbuf, x, y, key, palette)
                 else:  # 直接驱动
@@ -490,89 +783,70 @@ class EasyDisplay:
                     width = buffer_size * 8
                     # Use different types of buffers according to different color types
                     if color_type == "RGB565":
-                        data_fbuf = FrameBuffer(bytearray(buffer_size * 16), width, 1, RGB565)
+                        group = 16  # 每字节（8 个像素）MONO 数据渲染后占用的字节数
+                        out = bytearray(buffer_size * group)
+                        data_fbuf = FrameBuffer(out, width, 1, RGB565)
                     elif color_type == "MONO":
-                        data_fbuf = FrameBuffer(bytearray(buffer_size), width, 1, MONO_HLSB)  # Not tested
+                        group = 1
+                        out = bytearray(buffer_size)
+                        data_fbuf = FrameBuffer(out, width, 1, MONO_HLSB)  # Not tested
                     else:
                         raise ValueError("Unsupported color_type: {}".format(color_type))
                     data_fbuf_blit = data_fbuf.blit
+                    fbuf_data = memoryview(out)  # 直接发送渲染结果，不复制
                     # Read a picture several times, taking a part of it each time
-                    data = bytearray(f_read(buffer_size))
-                    while data:
-                        fbuf = FrameBuffer(data, width, 1, MONO_HLSB)
+                    # 读取缓冲区和对应的 FrameBuffer 只创建一次，循环内不再分配内存
+                    data = bytearray(buffer_size)
+                    fbuf = FrameBuffer(data, width, 1, MONO_HLSB)
+                    len_data = f_rinto(data)
+                    while len_data:
                         data_fbuf_blit(fbuf, 0, 0, key, palette)  # Render MONO pixels into RGB565 pixels
-                        len_data = len(data)
                         if len_data < buffer_size:  # Limit the data sent to no more than the Buffer size, so as to avoid data overflow and affect the display
-                            if color_type == "RGB565":
-                                fbuf_data = bytearray(data_fbuf)[:len_data * 16]
-                            elif color_type == "MONO":
-                                fbuf_data = bytearray(data_fbuf)[:len_data]
-                            else:
-                                raise ValueError("Unsupported color_type: {}".format(color_type))
+                            write_data(fbuf_data[:len_data * group])
                         else:
-                            fbuf_data = bytearray(data_fbuf)
-                        write_data(fbuf_data)
-                        data = bytearray(f_read(buffer_size))
+                            write_data(fbuf_data)
+                        len_data = f_rinto(data)
 
             elif file_format == b"P6\n":  # P6 像素图 二进制
                 max_pixel_value = f.readline()  # 获取最大像素值
                 r_height = range(_height)
                 r_width = range(_width)
-                color_bytearray = bytearray(3)  # 为变量预分配内存
-                f_rinto = f.readinto
-                try:
-                    dp_color = dp.color
-                except AttributeError:
-                    dp_color = self.rgb565_color
+                row = bytearray(_width * 3)  # 每次读取一整行像素
                 dp_pixel = dp.pixel
-                if self._buffer:  # Framebuffer 模式
-                    if color_type == "RGB565":
-                        buffer = bytearray(_width * 2)
-                    for _y in r_height:  # 逐行显示图片
-                        for _x in r_width:
-                            f_rinto(color_bytearray)
-                            r, g, b = color_bytearray[0], color_bytearray[1], color_bytearray[2]
-                            if invert:
-                                r = 255 - r
-                                g = 255 - g
-                                b = 255 - b
-                            if color_type == "RGB565":
-                                buffer[_x * 2: (_x + 1) * 2] = dp_color(r, g, b).to_bytes(2, 'big')  # 通过索引赋值
-                            elif color_type == "MONO":
-                                _color = int((r + g + b) / 3) >= 127
-                                if _color:
-                                    _color = color
-                                else:
-                                    _color = bg_color
-                                if _color != key:  # 不显示指定颜色
-                                    dp_pixel(_x + x, _y + y, _color)
-                        if color_type == "RGB565":
-                            fbuf = FrameBuffer(buffer, _width, 1, RGB565)
-                            dp.blit(fbuf, x, y + _y, key)
-                else:  # 直接驱动
+                if not self._buffer:  # 直接驱动
                     dp.set_window(x, y, x + _width - 1, y + _height - 1)  # 设置窗口
+                if color_type == "RGB565":
+                    # 由 viper 函数将整行像素批量转换为 RGB565
                     buffer = bytearray(_width * 2)
+                    flags = _ROW_INVERT if invert else 0
+                    if self._buffer:  # Framebuffer 模式
+                        fbuf = FrameBuffer(buffer, _width, 1, RGB565)
                     for _y in r_height:  # 逐行显示图片
-                        for _x in r_width:
-                            color_bytearray = f_read(3)
-                            r, g, b = color_bytearray[0], color_bytearray[1], color_bytearray[2]
-                            if invert:
-                                r = 255 - r
-                                g = 255 - g
-                                b = 255 - b
-                            if color_type == "RGB565":
-                                buffer[_x * 2: (_x + 1) * 2] = dp_color(
-                                    r, g, b).to_bytes(2, 'big')  # 通过索引赋值
-                            elif color_type == "MONO":
-                                _color = int((r + g + b) / 3) >= 127
-                                if _color:
-                                    _color = color
-                                else:
-                                    _color = bg_color
+                        f_rinto(row)
+                        _rgb888_to_rgb565(row, buffer, _width, flags)
+                        if self._buffer:
+                            dp.blit(fbuf, x, y + _y, key)
+                        else:
+                            dp.write_data(buffer)
+                elif color_type == "MONO":
+                    # 由 viper 函数将整行像素按亮度阈值批量转换为黑白位图
+                    bits = bytearray((_width + 7) >> 3)
+                    flags = _ROW_INVERT if invert else 0
+                    if self._buffer:  # Framebuffer 模式，通过调色板一次绘制一整行
+                        palette = FrameBuffer(bytearray(1), 2, 1, MONO_HLSB)
+                        palette.pixel(1, 0, color)
+                        palette.pixel(0, 0, bg_color)
+                        fbuf = FrameBuffer(bits, _width, 1, MONO_HLSB)
+                    for _y in r_height:  # 逐行显示图片
+                        f_rinto(row)
+                        _rgb888_to_mono(row, bits, _width, flags)
+                        if self._buffer:
+                            dp.blit(fbuf, x, y + _y, key, palette)
+                        else:
+                            for _x in r_width:
+                                _color = color if bits[_x >> 3] & (0x80 >> (_x & 7)) else bg_color
                                 if _color != key:  # 不显示指定颜色
                                     dp_pixel(_x + x, _y + y, _color)
-                        if color_type == "RGB565":
-                            dp.write_data(buffer)
             else:
                 raise TypeError("Unsupported File Format Type.")
 
@@ -633,12 +907,7 @@ class EasyDisplay:
             f_read = f.read
             f_rinto = f.readinto
             f_seek = f.seek
-            f_tell = f.tell()
             dp = self.display
-            try:
-                dp_color = dp.color
-            except AttributeError:
-                dp_color = self.rgb565_color
             dp_pixel = dp.pixel
             if f_read(2) == b'BM':  # 检查文件头
                 dummy = f_read(8)  # 文件大小占四个字节，文件作者占四个字节，file size(4), creator bytes(4)
@@ -661,60 +930,69 @@ class EasyDisplay:
                             _width = dp.width
                         if _height > dp.height:
                             _height = dp.height
-                        _color_bytearray = bytearray(3)  # 像素的二进制颜色
+                        row = bytearray(_width * 3)  # 每次读取一整行像素
                         if clear:  # 清屏
                             self.clear()
-                        buffer = bytearray(_width * 2)
                         self_buf = self._buffer
                         if not self_buf:
                             dp.set_window(x, y, x + _width - 1, y + _height - 1)  # 设置窗口
-                        r_width = range(_width)
+                        if flip:  # 图像数据从最后一行开始存储
+                            pos = offset + (_height - 1) * row_size
+                            step = -row_size
+                        else:
+                            pos = offset
+                            step = row_size
                         r_height = range(_height)
-                        for _y in r_height:
-                            if flip:
-                                pos = offset + (_height - 1 - _y) * row_size
-                            else:
-                                pos = offset + _y * row_size
-                            if f_tell != pos:
-                                f_seek(pos)  # 调整指针位置
-                            for _x in r_width:
-                                f_rinto(_color_bytearray)
-                                r, g, b = _color_bytearray[2], _color_bytearray[1], _color_bytearray[0]
-                                if invert:  # 颜色反转
-                                    r = 255 - r
-                                    g = 255 - g
-                                    b = 255 - b
-                                if self_buf:  # Framebuffer 模式
-                                    if color_type == "RGB565":
-                                        buffer[_x * 2: (_x + 1) * 2] = dp_color(
-                                            r, g, b).to_bytes(2, 'big')  # 通过索引赋值
-                                    elif color_type == "MONO":
-                                        _color = int((r + g + b) / 3) >= 127
-                                        if _color:
-                                            _color = color
-                                        else:
-                                            _color = bg_color
-                                        if _color != key:  # 不显示指定颜色
-                                            dp_pixel(_x + x, _y + y, _color)
-                                else:
-                                    if color_type == "RGB565":
-                                        buffer[_x * 2: (_x + 1) * 2] = dp_color(
-                                            r, g, b).to_bytes(2, 'big')  # 通过索引赋值
-                                    elif color_type == "MONO":
-                                        _color = int((r + g + b) / 3) >= 127
-                                        if _color:
-                                            _color = color
-                                        else:
-                                            _color = bg_color
+                        # 根据颜色类型和驱动模式分别使用专门的循环，避免在循环内重复判断
+                        if color_type == "RGB565":
+                            # 由 viper 函数将整行像素批量转换为 RGB565
+                            buffer = bytearray(_width * 2)
+                            flags = (_ROW_INVERT if invert else 0) | _ROW_BGR
+                            if self_buf:  # Framebuffer 模式
+                                fbuf = FrameBuffer(buffer, _width, 1, RGB565)
+                                dp_blit = dp.blit
+                                for _y in r_height:
+                                    f_seek(pos)  # 调整指针位置
+                                    f_rinto(row)
+                                    pos += step
+                                    _rgb888_to_rgb565(row, buffer, _width, flags)
+                                    dp_blit(fbuf, x, y + _y, key)
+                            else:  # 直接驱动
+                                write_data = dp.write_data
+                                for _y in r_height:
+                                    f_seek(pos)  # 调整指针位置
+                                    f_rinto(row)
+                                    pos += step
+                                    _rgb888_to_rgb565(row, buffer, _width, flags)
+                                    write_data(buffer)
+                        elif color_type == "MONO":
+                            # 由 viper 函数将整行像素按亮度阈值批量转换为黑白位图
+                            bits = bytearray((_width + 7) >> 3)
+                            flags = _ROW_INVERT if invert else 0
+                            if self_buf:  # Framebuffer 模式，通过调色板一次绘制一整行
+                                palette = FrameBuffer(bytearray(1), 2, 1, MONO_HLSB)
+                                palette.pixel(1, 0, color)
+                                palette.pixel(0, 0, bg_color)
+                                fbuf = FrameBuffer(bits, _width, 1, MONO_HLSB)
+                                dp_blit = dp.blit
+                                for _y in r_height:
+                                    f_seek(pos)  # 调整指针位置
+                                    f_rinto(row)
+                                    pos += step
+                                    _rgb888_to_mono(row, bits, _width, flags)
+                                    dp_blit(fbuf, x, y + _y, key, palette)
+                            else:  # 直接驱动
+                                r_width = range(_width)
+                                for _y in r_height:
+                                    f_seek(pos)  # 调整指针位置
+                                    f_rinto(row)
+                                    pos += step
+                                    _rgb888_to_mono(row, bits, _width, flags)
+                                    _py = y + _y
+                                    for _x in r_width:
+                                        _color = color if bits[_x >> 3] & (0x80 >> (_x & 7)) else bg_color
                                         if _color != key:  # 不显示指定颜色
-                                            dp_pixel(_x + x, _y + y, _color)
-
-                            if color_type == "RGB565":
-                                if self_buf:
-                                    fbuf = FrameBuffer(buffer, _width, 1, RGB565)
-                                    dp.blit(fbuf, x, y + _y, key)
-                                else:
-                                    dp.write_data(buffer)
+                                            dp_pixel(_x + x, _py, _color)
 
                         self.show() if show else 0  # 立即显示
                     else:
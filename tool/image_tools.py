@@ -6,6 +6,7 @@
 #   img2.save("文件名.pbm")
 
 import os
+from struct import pack_into
 
 try:
     from PIL import Image
@@ -160,6 +161,7 @@ def pbm_to_dat(file, output_path=".", color: int = 65535, bg_color: int = 0, rev
                 elif file_format == b"P6\n":
                     max_pixel_value = img.readline()  # 获取最大像素值
                     buffer = bytearray(_width * 2)
+                    _pack_into = pack_into
                     for _y in range(_height):  # 逐行处理图片
                         for _x in range(_width):  # 逐像素处理
                             color_bytearray = img.read(3)
@@ -168,7 +170,7 @@ def pbm_to_dat(file, output_path=".", color: int = 65535, bg_color: int = 0, rev
                                 r = 255 - r
                                 g = 255 - g
                                 b = 255 - b
-                            buffer[_x * 2: (_x + 1) * 2] = _color(r, g, b).to_bytes(2, 'big')  # 通过索引赋值
+                            _pack_into('>H', buffer, _x * 2, _color(r, g, b))  # 直接写入缓冲区，不创建临时对象
                         f.write(buffer)
         else:
             try: